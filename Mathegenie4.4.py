@@ -32,55 +32,228 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import sqlite3
 import random
-from datetime import datetime
 import time
-import operator
 import re # Import für RegEx
 import math # Import für sqrt, pi, pow, comb
+import functools # lru_cache für wiederkehrende Berechnungen
+import types # MappingProxyType für unveränderliche Parameter
+from collections import Counter # Zählt Aufgaben je (Thema, Schwierigkeit)
+import threading # Datenbank parallel zum Splash-Screen öffnen
+from concurrent.futures import ThreadPoolExecutor # Schreibvorgänge außerhalb des UI-Threads
+
+# Vorkompilierte RegEx-Muster (werden nicht bei jeder Aufgabe neu übersetzt)
+_VAR_RE = re.compile(r'[xyab]') # Variablen in Termen
+# Einsetzwerte (x=a=2, y=b=3) samt Malzeichen: "5x" -> "5 * (2)" (Variablen folgen immer auf ihren Koeffizienten)
+_VAR_SUB = {'x': ' * (2)', 'y': ' * (3)', 'a': ' * (2)', 'b': ' * (3)'}
+_NUM_RE = re.compile(r'-?\d+(?:\.\d+)?') # Normale Zahleneingabe (nach Komma->Punkt-Umwandlung)
+
+def _sub_var(match):
+    """Ersetzungsfunktion für _VAR_RE."""
+    return _VAR_SUB[match.group(0)]
+
+# Vorlagen für Lösungswege (per format_map befüllt)
+_STEPS_ZAHLENRAUM = (
+    "**Aufgabe:** {question}\n\n"
+    "1. Schritt: Führe die {op_name} aus.\n"
+    " {num1} {op} {num2} = {answer}\n"
+    "\n**Ergebnis:** {answer}"
+)
+_STEPS_RECHTECK_UMFANG = (
+    "**Aufgabe:** {question}\n\n"
+    "1. Formel: U = 2 * (l + w)\n"
+    "2. Einsatz: U = 2 * ({length} + {width}) = {answer}\n\n"
+    "**Ergebnis:** {answer} {unit}"
+)
+_STEPS_RECHTECK_FLAECHE = (
+    "**Aufgabe:** {question}\n\n"
+    "1. Formel: A = l * w\n"
+    "2. Einsatz: A = {length} * {width} = {answer}\n\n"
+    "**Ergebnis:** {answer} {unit}²"
+)
+_STEPS_MITTELWERT = (
+    "**Aufgabe:** {question}\n\n"
+    "1. Schritt: Formel für Mittelwert (MW) notieren.\n"
+    "   - MW = (Summe aller Werte) / (Anzahl der Werte)\n"
+    "2. Schritt: Alle Werte addieren.\n"
+    "   - Summe = {summanden} = {data_sum}\n"
+    "3. Schritt: Anzahl der Werte zählen.\n"
+    "   - Anzahl = {n}\n"
+    "4. Schritt: Dividieren.\n"
+    "   - MW = {data_sum} / {n} = {answer}\n\n"
+    "**Ergebnis (gerundet):** {answer_rounded}"
+)
+_STEPS_MEDIAN_KOPF = (
+    "**Aufgabe:** {question}\n\n"
+    "1. Schritt: Datenreihe der Größe nach ordnen.\n"
+    "   - Original: {original}\n"
+    "   - Sortiert: {sortiert}\n"
+    "2. Schritt: Anzahl der Werte bestimmen: n = {n}.\n"
+)
+
+# Geometrie: Lösungswege der übrigen Formen (exakte und gerundete Ergebnisse)
+_PI = math.pi
+_PI_STR = f"{_PI:.4f}" # Anzeigewert, wird unten direkt in die Vorlagen eingesetzt
+_GEOM_UNIT = "cm"
+_GEOM_HEAD = "**Aufgabe:** {question}\n\n"
+_STEPS_GEOMETRIE_EXAKT = {
+    'dreieck_flaeche': (_GEOM_HEAD +
+        "1. Formel: A = 0.5 * g * h\n"
+        "2. Einsatz: A = 0.5 * {base} * {height} = {answer}\n\n"
+        "**Ergebnis:** {answer} {unit}²"),
+    'trapez_flaeche': (_GEOM_HEAD +
+        "1. Formel: A = ((a + c) / 2) * h\n"
+        "2. Einsatz: A = (({a} + {c}) / 2) * {h}\n"
+        "   A = ({half}) * {h} = {answer}\n\n"
+        "**Ergebnis:** {answer} {unit}²"),
+    'wuerfel_volumen': (_GEOM_HEAD +
+        "1. Formel: V = a³\n"
+        "2. Einsatz: V = {a}³ = {answer}\n\n"
+        "**Ergebnis:** {answer} {unit}³"),
+    'wuerfel_oberflaeche': (_GEOM_HEAD +
+        "1. Formel: O = 6 * a²\n"
+        "2. Einsatz: O = 6 * {a}² = 6 * {a_sq} = {answer}\n\n"
+        "**Ergebnis:** {answer} {unit}²"),
+    'quader_volumen': (_GEOM_HEAD +
+        "1. Formel: V = l * b * h\n"
+        "2. Einsatz: V = {l} * {w} * {h} = {answer}\n\n"
+        "**Ergebnis:** {answer} {unit}³"),
+    'quader_oberflaeche': (_GEOM_HEAD +
+        "1. Formel: O = 2 * (lb + lh + bh)\n"
+        "2. Einsatz: O = 2 * ({l}*{w} + {l}*{h} + {w}*{h})\n"
+        "   O = 2 * ({lw} + {lh} + {wh}) = {answer}\n\n"
+        "**Ergebnis:** {answer} {unit}²"),
+}
+_STEPS_GEOMETRIE_GERUNDET = {
+    'kreis_umfang': (_GEOM_HEAD +
+        "1. Formel: U = 2 * Pi * r\n"
+        "2. Einsatz: U = 2 * {pi} * {radius} ≈ {answer}\n\n"
+        "**Ergebnis (gerundet):** {answer_rounded} {unit}"),
+    'kreis_flaeche': (_GEOM_HEAD +
+        "1. Formel: A = Pi * r²\n"
+        "2. Einsatz: A = {pi} * {radius}² = {answer}\n\n"
+        "**Ergebnis (gerundet):** {answer_rounded} {unit}²"),
+    'zylinder_volumen': (_GEOM_HEAD +
+        "1. Formel: V = Pi * r² * h\n"
+        "2. Einsatz: V = {pi} * {radius}² * {height} ≈ {answer}\n\n"
+        "**Ergebnis (gerundet):** {answer_rounded} {unit}³"),
+    'zylinder_oberflaeche': (_GEOM_HEAD +
+        "1. Formel: O = 2*Pi*r*h (Mantel) + 2*Pi*r² (Deckel/Boden)\n"
+        "2. Einsatz: O = (2*{pi}*{radius}*{height}) + (2*{pi}*{radius}²) ≈ {answer}\n\n"
+        "**Ergebnis (gerundet):** {answer_rounded} {unit}²"),
+    'kegel_volumen': (_GEOM_HEAD +
+        "1. Formel: V = (1/3) * Pi * r² * h\n"
+        "2. Einsatz: V = (1/3) * {pi} * {radius}² * {height} ≈ {answer}\n\n"
+        "**Ergebnis (gerundet):** {answer_rounded} {unit}³"),
+    'kegel_oberflaeche': (_GEOM_HEAD +
+        "1. Formel: O = Pi*r² (Grundfläche) + Pi*r*s (Mantel)\n"
+        "2. Seitenlinie s = √(r² + h²) = √({radius}² + {height}²) ≈ {s:.2f}\n"
+        "3. Einsatz: O = ({pi} * {radius}²) + ({pi} * {radius} * {s:.2f}) ≈ {answer}\n\n"
+        "**Ergebnis (gerundet):** {answer_rounded} {unit}²"),
+    'kugel_volumen': (_GEOM_HEAD +
+        "1. Formel: V = (4/3) * Pi * r³\n"
+        "2. Einsatz: V = (4/3) * {pi} * {radius}³ ≈ {answer}\n\n"
+        "**Ergebnis (gerundet):** {answer_rounded} {unit}³"),
+    'kugel_oberflaeche': (_GEOM_HEAD +
+        "1. Formel: O = 4 * Pi * r²\n"
+        "2. Einsatz: O = 4 * {pi} * {radius}² ≈ {answer}\n\n"
+        "**Ergebnis (gerundet):** {answer_rounded} {unit}²"),
+}
+
+# Schlüssel -> (Vorlage, Felder, die erst beim Anzeigen deutsch formatiert werden)
+_STEPS_TEMPLATES = {
+    'zahlenraum': (_STEPS_ZAHLENRAUM, ('answer',)),
+    'rechteck_umfang': (_STEPS_RECHTECK_UMFANG, ('answer',)),
+    'rechteck_flaeche': (_STEPS_RECHTECK_FLAECHE, ('answer',)),
+    'mittelwert': (_STEPS_MITTELWERT, ('answer', 'answer_rounded')),
+    **{key: (template, ('answer',)) for key, template in _STEPS_GEOMETRIE_EXAKT.items()},
+    **{key: (template.replace('{pi}', _PI_STR), ('answer', 'answer_rounded'))
+       for key, template in _STEPS_GEOMETRIE_GERUNDET.items()},
+}
+
+def format_steps(solution_steps):
+    """Gibt den Lösungsweg als Text zurück.
+    Lösungswege als (Schlüssel, Werte) werden erst hier (bei falscher Antwort) formatiert."""
+    if isinstance(solution_steps, str):
+        return solution_steps
+    key, values = solution_steps
+    template, german_fields = _STEPS_TEMPLATES[key]
+    fields = dict(values)
+    for name in german_fields:
+        fields[name] = format_german(fields[name])
+    return template.format_map(fields)
 
 # NEU: Helper-Funktion zur Formatierung von Zahlen im deutschen Format
 def format_german(number):
     """Formatiert eine Zahl (int/float) ins deutsche Format (z. B. 1.453.557,0)"""
-    try:
-        # Runde auf 5 Stellen, um float-Ungenauigkeiten zu mildern
-        number = round(number, 5)
-    except TypeError:
+    if isinstance(number, int):
+        return f"{number:,d}".replace(',', '.') # Ganzzahlen: nur Tausenderpunkte
+    if isinstance(number, float):
+        return _format_german_float(number)
+    return str(number)
+
+@functools.lru_cache(maxsize=512)
+def _format_german_float(number):
+    """Float-Zweig von format_german (gecacht)."""
+    # Runde auf 5 Stellen, um float-Ungenauigkeiten zu mildern (+ 0.0 macht aus -0.0 eine 0.0)
+    number = round(number, 5) + 0.0
+    if not math.isfinite(number):
         return str(number)
 
-    # In String umwandeln und Nullen am Ende entfernen
-    s = f"{number:f}".rstrip('0')
-
-    # Wenn ein einsames Komma bleibt, entferne es
-    if s.endswith('.'):
-        s = s[:-1]
-
-    parts = s.split('.')
-    integer_part = parts[0]
-    decimal_part = parts[1] if len(parts) > 1 else ""
-
-    sign = ""
-    if integer_part.startswith('-'):
-        sign = '-'
-        integer_part = integer_part[1:] # Nur der Zahlenwert
-
-    try:
-        # Tausendertrennzeichen (englisch)
-        integer_part_formatted = f"{int(integer_part):,}"
-    except ValueError:
-        # Fallback, falls es kein reiner Integer ist (sollte nicht passieren)
-        integer_part_formatted = integer_part
-
-    # Tausenderpunkte (deutsch)
-    integer_part_german = integer_part_formatted.replace(',', '.')
-
-    if decimal_part:
-        return f"{sign}{integer_part_german},{decimal_part}"
+    sign = '-' if number < 0 else ''
+    integer_part, _, decimal_part = f"{abs(number):f}".partition('.')
+    decimal_part = decimal_part.rstrip('0') or '0' # "5.0" -> "5,0"
+
+    # Tausendertrennzeichen (englisch) -> Tausenderpunkte (deutsch)
+    integer_part_german = f"{int(integer_part):,}".replace(',', '.')
+    return f"{sign}{integer_part_german},{decimal_part}"
+
+# Statistik-Kern: Summe, Mittelwert, sortierte Reihe und Median gebündelt berechnen
+def _stats_kernel(data):
+    """Liefert (Summe, Mittelwert, sortierte Liste, Median) für eine Liste von Zahlen."""
+    total = sum(data)
+    n = len(data)
+    data_sorted = sorted(data)
+    if n % 2 == 1:
+        median = data_sorted[n // 2]
     else:
-        # Handle "5.0" -> "5,0"
-        if isinstance(number, float) and number == int(number):
-            return f"{sign}{integer_part_german},0"
+        median = (data_sorted[n // 2 - 1] + data_sorted[n // 2]) / 2
+    return total, total / n, data_sorted, median
+
+# Rechenkern für Mehrterm-Aufgaben: reine Zahlenarbeit, ohne String-Formatierung
+def _arith_chain(nums, ops, allow_negatives):
+    """Rechnet eine Kette von links nach rechts aus.
+    Gibt (tatsächlich verwendete Operatoren, Zwischenergebnisse) zurück."""
+    ops_used = []
+    values = [nums[0]]
+    current_val = nums[0]
+    for op, num2 in zip(ops, nums[1:]):
+        if op == '-' and not allow_negatives and current_val < num2:
+            op = '+' # Verhindere negative Zwischenergebnisse, wenn nicht erlaubt
+            current_val += num2
+        elif op == '-':
+            current_val -= num2
         else:
-            return f"{sign}{integer_part_german}"
+            current_val += num2
+        ops_used.append(op)
+        values.append(current_val)
+    return ops_used, values
+
+# Toleranz-Vergleich von Benutzer- und Musterlösung (gemeinsam für Prüfung und Auswertung)
+def _is_correct_answer(user_answer, correct_answer):
+    """True, wenn die Eingabe eine Zahl ist und um weniger als 0.1 vom Ergebnis abweicht."""
+    return isinstance(user_answer, (int, float)) and abs(user_answer - correct_answer) < 0.1
+
+def _parse_answer(cleaned_input):
+    """Wandelt die bereinigte Eingabe in float um.
+    Gibt None bei leerer Eingabe und "Ungültige Eingabe" bei Unlesbarem zurück."""
+    if _NUM_RE.fullmatch(cleaned_input):
+        return float(cleaned_input)
+    if cleaned_input == "":
+        return None
+    try:
+        return float(cleaned_input) # Seltene Formate (z. B. "+5", "1e3")
+    except ValueError:
+        return "Ungültige Eingabe"
 
 # --- HILFSKLASSEN ---
 
@@ -122,215 +295,351 @@ class ToolTip:
 # ==================================
 # NEUE FEEDBACK DIALOG KLASSE (ersetzt messagebox)
 # ==================================
-class FeedbackDialog(tk.Toplevel):
+# Skizzen: eine Zeichenfunktion je Form (Canvas oder _SketchRecorder)
+# 2D
+def _draw_rechteck(canvas, info):
+    l_text = f"Länge: {info.get('l', '?')}"
+    w_text = f"Breite: {info.get('w', '?')}"
+    canvas.create_rectangle(40, 40, 180, 110, outline="blue", width=2)
+    canvas.create_text(110, 30, text=l_text, fill="black")
+    canvas.create_text(30, 75, text=w_text, fill="black", anchor="e")
+
+def _draw_kreis(canvas, info):
+    r = info.get('r', '?')
+    r_text = f"Radius: {r}"
+    canvas.create_oval(60, 20, 160, 120, outline="red", width=2)
+    canvas.create_line(110, 70, 160, 70, fill="red", dash=(4, 2))
+    canvas.create_text(135, 80, text=r_text, fill="black", anchor="w")
+
+def _draw_dreieck(canvas, info):
+    b_text = f"g: {info.get('b', '?')}"
+    h_text = f"h: {info.get('h', '?')}"
+    canvas.create_polygon(50, 120, 170, 120, 50, 30, fill="#eeeeee", outline="purple", width=2)
+    canvas.create_line(50, 120, 50, 30, fill="purple", dash=(4, 2)) # Höhe
+    canvas.create_text(110, 130, text=b_text, fill="black")
+    canvas.create_text(40, 75, text=h_text, fill="black", anchor="e")
+
+def _draw_dreieck_recht(canvas, info): # NEU für Pythagoras
+    a_text = f"a: {info.get('a', '?')}"
+    b_text = f"b: {info.get('b', '?')}"
+    c_text = f"c: {info.get('c', '?')}"
+    # Rechtwinkliges Dreieck
+    canvas.create_polygon(50, 120, 170, 120, 50, 30, fill="#eeeeee", outline="black", width=2)
+    # Rechter Winkel Symbol
+    canvas.create_rectangle(50, 110, 60, 120, outline="black")
+    canvas.create_text(110, 130, text=b_text, fill="black") # Kathete b
+    canvas.create_text(40, 75, text=a_text, fill="black", anchor="e") # Kathete a
+    canvas.create_text(115, 75, text=c_text, fill="blue") # Hypotenuse c
+
+def _draw_trapez(canvas, info):
+    a_text = f"a: {info.get('a', '?')}"
+    c_text = f"c: {info.get('c', '?')}"
+    h_text = f"h: {info.get('h', '?')}"
+    canvas.create_polygon(50, 110, 170, 110, 130, 40, 90, 40, fill="#eeeeee", outline="orange",
+                          width=2)
+    canvas.create_line(50, 110, 50, 40, fill="orange", dash=(4, 2)) # Höhe
+    canvas.create_text(110, 120, text=a_text, fill="black")
+    canvas.create_text(110, 30, text=c_text, fill="black")
+    canvas.create_text(40, 75, text=h_text, fill="black", anchor="e")
+
+# 3D
+def _draw_wuerfel(canvas, info):
+    a_text = f"a: {info.get('a', '?')}"
+    canvas.create_rectangle(70, 70, 150, 150, outline="black", width=2, fill="#ddddff") # Vorne
+    canvas.create_rectangle(50, 50, 130, 130, outline="grey", width=2) # Hinten
+    canvas.create_line(70, 70, 50, 50, fill="grey")
+    canvas.create_line(150, 70, 130, 50, fill="grey")
+    canvas.create_line(70, 150, 50, 130, fill="grey")
+    canvas.create_line(150, 150, 130, 130, fill="grey")
+    canvas.create_text(110, 60, text=a_text, fill="black")
+
+def _draw_kugel(canvas, info):
+    r = info.get('r', '?')
+    r_text = f"Radius: {r}"
+    canvas.create_oval(60, 30, 160, 130, outline="blue", width=2, fill="#eeeeff") # Kugel
+    canvas.create_oval(60, 75, 160, 85, outline="blue", dash=(4, 2)) # Äquator
+    canvas.create_line(110, 80, 160, 80, fill="blue", dash=(2, 2)) # Radius
+    canvas.create_text(135, 90, text=r_text, fill="black", anchor="w")
+
+def _draw_quader(canvas, info):
+    l_text = f"l: {info.get('l', '?')}"
+    w_text = f"b: {info.get('w', '?')}"
+    h_text = f"h: {info.get('h', '?')}"
+    canvas.create_rectangle(70, 70, 170, 130, outline="black", width=2, fill="#ddddff") # Vorne
+    canvas.create_rectangle(50, 50, 150, 110, outline="grey", width=2) # Hinten
+    canvas.create_line(70, 70, 50, 50, fill="grey")
+    canvas.create_line(170, 70, 150, 50, fill="grey")
+    canvas.create_line(70, 130, 50, 110, fill="grey")
+    canvas.create_line(170, 130, 150, 110, fill="grey")
+    canvas.create_text(120, 60, text=l_text, fill="black")
+    canvas.create_text(160, 60, text=w_text, fill="black")
+    canvas.create_text(60, 100, text=h_text, fill="black")
+
+def _draw_zylinder(canvas, info):
+    r_text = f"r: {info.get('r', '?')}"
+    h_text = f"h: {info.get('h', '?')}"
+    canvas.create_oval(50, 110, 170, 130, outline="black", width=2, fill="#ddddff") # Boden
+    canvas.create_line(50, 120, 50, 50, fill="black", width=2) # Seite links
+    canvas.create_line(170, 120, 170, 50, fill="black", width=2) # Seite rechts
+    canvas.create_oval(50, 40, 170, 60, outline="black", width=2, fill="#ddddff") # Deckel
+    canvas.create_line(110, 120, 110, 50, fill="grey", dash=(2, 2)) # Höhe (Mitte)
+    canvas.create_text(40, 85, text=h_text, fill="black")
+    canvas.create_text(110, 30, text=r_text, fill="black")
+
+def _draw_kegel(canvas, info):
+    r_text = f"r: {info.get('r', '?')}"
+    h_text = f"h: {info.get('h', '?')}"
+    canvas.create_oval(50, 110, 170, 130, outline="black", width=2, fill="#ddddff") # Boden
+    canvas.create_line(50, 120, 110, 30, fill="black", width=2) # Seite links
+    canvas.create_line(170, 120, 110, 30, fill="black", width=2) # Seite rechts
+    canvas.create_line(110, 120, 110, 30, fill="grey", dash=(2, 2)) # Höhe
+    canvas.create_text(40, 85, text=h_text, fill="black")
+    canvas.create_text(110, 100, text=r_text, fill="black")
+
+# Statistik
+def _draw_bar_chart(canvas, info):
+    data = info.get('data', ())
+    if not data:
+        canvas.create_text(110, 75, text="Keine Daten für Skizze.")
+        return
+
+    max_val = max(data) if data else 1
+    padding = 20
+    canvas_width = 220
+    canvas_height = 150
+
+    # Achsen
+    canvas.create_line(padding, canvas_height - padding, canvas_width - padding, canvas_height - padding) # X
+
+    bar_width = (canvas_width - 2 * padding) / len(data)
+    bar_spacing = 2
+    max_bar_height = canvas_height - 2 * padding - 10 # Platz für Text
+
+    for i, val in enumerate(data):
+        x0 = padding + i * bar_width + bar_spacing
+        x1 = padding + (i + 1) * bar_width - bar_spacing
+        bar_height = (val / max_val) * max_bar_height
+        y0 = canvas_height - padding - bar_height
+        y1 = canvas_height - padding
+        canvas.create_rectangle(x0, y0, x1, y1, fill="#4a90e2", outline="black")
+        canvas.create_text((x0 + x1) / 2, y0 - 8, text=str(val), font=("Arial", 10))
+
+def _draw_unknown(canvas, info):
+    canvas.create_text(110, 75, text="Keine Skizze verfügbar.")
+
+# Zeichenfunktion je Form
+_SHAPE_DRAWERS = {
+    'Rechteck': _draw_rechteck,
+    'Kreis': _draw_kreis,
+    'Dreieck': _draw_dreieck,
+    'DreieckRecht': _draw_dreieck_recht,
+    'Trapez': _draw_trapez,
+    'Würfel': _draw_wuerfel,
+    'Kugel': _draw_kugel,
+    'Quader': _draw_quader,
+    'Zylinder': _draw_zylinder,
+    'Kegel': _draw_kegel,
+    'BarChart': _draw_bar_chart,
+}
+
+# Gemeinsame Skizzen-Zeichnung für Feedback-Dialog und Formelsammlung
+def _draw_sketch_items(canvas, info):
+    """Zeichnet die Geometrie- oder Statistik-Skizze aus info auf das übergebene Canvas."""
+    _SHAPE_DRAWERS.get(info.get('shape'), _draw_unknown)(canvas, info)
+
+
+class _CenteredModalMixin:
+    """Gemeinsames Zentrieren und Modal-Schalten für die Dialog-Klassen (Toplevel)."""
+    def _center_and_show(self, parent):
+        """Zentriert den (ausgeblendeten) Dialog über parent, zeigt ihn und macht ihn modal.
+        Die sechs Größenabfragen laufen in einem einzigen Tcl-Aufruf."""
+        self.update_idletasks()
+        p, d = str(parent), str(self)
+        parent_x, parent_y, parent_width, parent_height, dialog_width, dialog_height = map(int, self.tk.eval(
+            f"list [winfo rootx {p}] [winfo rooty {p}] [winfo width {p}] [winfo height {p}]"
+            f" [winfo reqwidth {d}] [winfo reqheight {d}]").split())
+
+        x = parent_x + (parent_width // 2) - (dialog_width // 2)
+        y = parent_y + (parent_height // 2) - (dialog_height // 2)
+        self.geometry(f"+{x}+{y}")
+        self.deiconify()
+        self.wait_visibility() # grab_set ist erst möglich, wenn das Fenster sichtbar ist
+        self.grab_set() # Modal
+
+
+class _SketchRecorder:
+    """Nimmt die create_*-Aufrufe einer Skizze auf, statt sie sofort an Tk zu schicken."""
+    def __init__(self):
+        self.items = [] # (Elementtyp, Koordinaten, Optionen)
+
+    def _record(kind):
+        def create(self, *args, **kw):
+            self.items.append((kind, args, kw))
+        return create
+
+    create_arc = _record('arc')
+    create_line = _record('line')
+    create_oval = _record('oval')
+    create_polygon = _record('polygon')
+    create_rectangle = _record('rectangle')
+    create_text = _record('text')
+    del _record
+
+    def tcl_items(self):
+        """Die Aufnahme als Tcl-Listen: (Typ, Koordinaten..., -Option, Wert, ...)."""
+        return tuple((kind, *args, *(part for name, value in kw.items() for part in ('-' + name, value)))
+                     for kind, args, kw in self.items)
+
+
+def _sketch_key(info):
+    """Hashbarer Schlüssel für info (Listen wie die BarChart-Daten werden zu Tupeln)."""
+    return tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in info.items()))
+
+@functools.lru_cache(maxsize=64)
+def _sketch_display_list(key):
+    """Zeichnet eine Skizze in einen _SketchRecorder auf."""
+    recorder = _SketchRecorder()
+    _draw_sketch_items(recorder, dict(key))
+    return recorder.tcl_items()
+
+# Tcl-Prozedur, die alle Elemente einer Skizze in einem einzigen Aufruf anlegt
+_SKETCH_PROC = "proc ::mathegenie_sketch {canvas items} { foreach item $items { $canvas create {*}$item } }"
+_sketch_proc_defined = False
+
+def _create_items(canvas, items):
+    """Legt aufbereitete Elemente über _SKETCH_PROC an."""
+    global _sketch_proc_defined
+    if not _sketch_proc_defined:
+        canvas.tk.eval(_SKETCH_PROC)
+        _sketch_proc_defined = True
+    canvas.tk.call('::mathegenie_sketch', str(canvas), items)
+
+def _draw_cached_sketch(canvas, info):
+    """Zeichnet die (zwischengespeicherte) Skizze auf das Canvas."""
+    _create_items(canvas, _sketch_display_list(_sketch_key(info)))
+
+# Fünfzackiger Stern der Trophäe als Polygon (Mitte 100/140)
+_STAR_POINTS = tuple(round(c + r * f(-math.pi / 2 + i * math.pi / 5), 1)
+                     for i, r in enumerate((18, 7.5) * 5)
+                     for c, f in ((100, math.cos), (140, math.sin)))
+
+@functools.lru_cache(maxsize=1)
+def _trophy_items():
+    """Zeichnet die Trophäe des Zertifikats in einen _SketchRecorder auf."""
+    canvas = _SketchRecorder()
+    # Trophäen-Basis
+    canvas.create_rectangle(70, 190, 130, 200, fill="#c0c0c0", outline="#c0c0c0") # Silber-Basis
+    canvas.create_rectangle(80, 180, 120, 190, fill="#FFD700", outline="#b8860b") # Gold-Stamm
+    # Trophäen-Kelch
+    canvas.create_polygon(60, 100, 80, 180, 120, 180, 140, 100, fill="#FFD700", outline="#b8860b", width=2)
+    # Trophäen-Henkel
+    canvas.create_arc(30, 110, 80, 160, start=0, extent=180, style=tk.ARC, outline="#FFD700", width=6)
+    canvas.create_arc(120, 110, 170, 160, start=0, extent=-180, style=tk.ARC, outline="#FFD700", width=6)
+    # Stern als Polygon
+    canvas.create_polygon(*_STAR_POINTS, fill="#FFFFFF", outline="")
+    return canvas.tcl_items()
+
+
+class FeedbackDialog(_CenteredModalMixin, tk.Toplevel):
     """
     Ein modales Dialogfeld, das Feedback (richtig/falsch) und optional
     eine Geometrie- oder Statistik-Skizze auf einem Canvas anzeigt.
+    Mit on_close wird der Dialog beim Schließen nur ausgeblendet und über
+    show_feedback() wiederverwendet.
     """
-    def __init__(self, parent, title, is_correct, message, drawing_info=None):
+    def __init__(self, parent, title, is_correct, message, drawing_info=None, on_close=None):
         super().__init__(parent)
-        self.title(title)
+        self.withdraw() # Erst nach dem Zentrieren zeigen (kein Springen von 0,0)
         self.transient(parent) # Bleibt im Vordergrund
-        self.grab_set() # Modal
         self.config(bg="#f0f0f0")
 
+        self._title_label = tk.Label(self, font=("Arial", 18, "bold"), bg="#f0f0f0")
+        self._title_label.pack(pady=(15, 10))
+
+        self._message_label = tk.Label(self, font=("Arial", 12), bg="#f0f0f0", justify=tk.LEFT,
+                                       wraplength=450)
+        self._message_label.pack(padx=20, pady=(0, 10))
+
+        # Skizzen-Canvas: wird nur gepackt, wenn es eine Skizze gibt
+        self._canvas = tk.Canvas(self, width=220, height=150, bg="white", highlightthickness=1,
+                                 highlightbackground="black")
+
+        self._ok_button = ttk.Button(self, text="OK", command=self._close, style='Dialog.TButton')
+        self._ok_button.pack(pady=15, ipadx=20)
+        self.protocol("WM_DELETE_WINDOW", self._close)
+
+        self._show(parent, title, is_correct, message, drawing_info, on_close)
+
+    def _show(self, parent, title, is_correct, message, drawing_info=None, on_close=None):
+        """Setzt die Inhalte (neu) und zeigt den Dialog zentriert an."""
+        self._on_close = on_close # Optionaler Callback nach dem Schließen
+        self.title(title)
+
         if is_correct:
             title_text = " Richtig!"
             title_color = "#28a745" # Grün
         else:
             title_text = "X Leider falsch!"
             title_color = "#dc3545" # Rot
+        self._title_label.config(text=title_text, fg=title_color)
+        self._message_label.config(text=message)
 
-        title_label = tk.Label(self, text=title_text, font=("Arial", 18, "bold"), fg=title_color, bg="#f0f0f0")
-        title_label.pack(pady=(15, 10))
-
-        message_label = tk.Label(self, text=message, font=("Arial", 12), bg="#f0f0f0", justify=tk.LEFT,
-                                 wraplength=450)
-        message_label.pack(padx=20, pady=(0, 10))
-
+        self._canvas.delete("all")
+        self._canvas.pack_forget()
         if drawing_info:
             try:
                 self._draw_sketch(drawing_info)
             except Exception as e:
                 print(f"Fehler beim Zeichnen der Skizze: {e}")
 
-        style = ttk.Style()
-        style.configure('Dialog.TButton', font=('Arial', 12))
-
-        ok_button = ttk.Button(self, text="OK", command=self.destroy, style='Dialog.TButton')
-        ok_button.pack(pady=15, ipadx=20)
-
-        # Dialog zentrieren
-        self.update_idletasks()
-        parent_x = parent.winfo_rootx()
-        parent_y = parent.winfo_rooty()
-        parent_width = parent.winfo_width()
-        parent_height = parent.winfo_height()
-
-        dialog_width = self.winfo_width()
-        dialog_height = self.winfo_height()
+        self._center_and_show(parent) # Zentrieren, anzeigen, modal machen
+        if on_close is None:
+            self.wait_window() # Blockiert, bis der Dialog geschlossen wird
 
-        x = parent_x + (parent_width // 2) - (dialog_width // 2)
-        y = parent_y + (parent_height // 2) - (dialog_height // 2)
-
-        self.geometry(f"+{x}+{y}")
-        self.wait_window() # Blockiert, bis der Dialog geschlossen wird
+    def _close(self):
+        if self._on_close is None: # Blockierender Dialog: wird nicht wiederverwendet
+            self.destroy()
+            return
+        self.grab_release()
+        self.withdraw()
+        _feedback_pool.append(self)
+        self._on_close()
 
     # --- MODIFIZIERT: _draw_sketch (mit mehr Formen) ---
     def _draw_sketch(self, info):
-        """Zeichnet die Geometrie- oder Statistik-Skizze auf ein Canvas."""
-        canvas = tk.Canvas(self, width=220, height=150, bg="white", highlightthickness=1,
-                           highlightbackground="black")
-
-        shape = info.get('shape')
-
-        # 2D
-        if shape == 'Rechteck':
-            l_text = f"Länge: {info.get('l', '?')}"
-            w_text = f"Breite: {info.get('w', '?')}"
-            canvas.create_rectangle(40, 40, 180, 110, outline="blue", width=2)
-            canvas.create_text(110, 30, text=l_text, fill="black")
-            canvas.create_text(30, 75, text=w_text, fill="black", anchor="e")
-
-        elif shape == 'Kreis':
-            r = info.get('r', '?')
-            r_text = f"Radius: {r}"
-            canvas.create_oval(60, 20, 160, 120, outline="red", width=2)
-            canvas.create_line(110, 70, 160, 70, fill="red", dash=(4, 2))
-            canvas.create_text(135, 80, text=r_text, fill="black", anchor="w")
-
-        elif shape == 'Dreieck':
-            b_text = f"g: {info.get('b', '?')}"
-            h_text = f"h: {info.get('h', '?')}"
-            canvas.create_polygon(50, 120, 170, 120, 50, 30, fill="#eeeeee", outline="purple", width=2)
-            canvas.create_line(50, 120, 50, 30, fill="purple", dash=(4, 2)) # Höhe
-            canvas.create_text(110, 130, text=b_text, fill="black")
-            canvas.create_text(40, 75, text=h_text, fill="black", anchor="e")
-
-        elif shape == 'DreieckRecht': # NEU für Pythagoras
-            a_text = f"a: {info.get('a', '?')}"
-            b_text = f"b: {info.get('b', '?')}"
-            c_text = f"c: {info.get('c', '?')}"
-            # Rechtwinkliges Dreieck
-            canvas.create_polygon(50, 120, 170, 120, 50, 30, fill="#eeeeee", outline="black", width=2)
-            # Rechter Winkel Symbol
-            canvas.create_rectangle(50, 110, 60, 120, outline="black")
-            canvas.create_text(110, 130, text=b_text, fill="black") # Kathete b
-            canvas.create_text(40, 75, text=a_text, fill="black", anchor="e") # Kathete a
-            canvas.create_text(115, 75, text=c_text, fill="blue") # Hypotenuse c
-
-        elif shape == 'Trapez':
-            a_text = f"a: {info.get('a', '?')}"
-            c_text = f"c: {info.get('c', '?')}"
-            h_text = f"h: {info.get('h', '?')}"
-            canvas.create_polygon(50, 110, 170, 110, 130, 40, 90, 40, fill="#eeeeee", outline="orange",
-                                  width=2)
-            canvas.create_line(50, 110, 50, 40, fill="orange", dash=(4, 2)) # Höhe
-            canvas.create_text(110, 120, text=a_text, fill="black")
-            canvas.create_text(110, 30, text=c_text, fill="black")
-            canvas.create_text(40, 75, text=h_text, fill="black", anchor="e")
-
-        # 3D
-        elif shape == 'Würfel':
-            a_text = f"a: {info.get('a', '?')}"
-            canvas.create_rectangle(70, 70, 150, 150, outline="black", width=2, fill="#ddddff") # Vorne
-            canvas.create_rectangle(50, 50, 130, 130, outline="grey", width=2) # Hinten
-            canvas.create_line(70, 70, 50, 50, outline="grey")
-            canvas.create_line(150, 70, 130, 50, outline="grey")
-            canvas.create_line(70, 150, 50, 130, outline="grey")
-            canvas.create_line(150, 150, 130, 130, outline="grey")
-            canvas.create_text(110, 60, text=a_text, fill="black")
-
-        elif shape == 'Kugel':
-            r = info.get('r', '?')
-            r_text = f"Radius: {r}"
-            canvas.create_oval(60, 30, 160, 130, outline="blue", width=2, fill="#eeeeff") # Kugel
-            canvas.create_oval(60, 75, 160, 85, outline="blue", dash=(4, 2)) # Äquator
-            canvas.create_line(110, 80, 160, 80, fill="blue", dash=(2, 2)) # Radius
-            canvas.create_text(135, 90, text=r_text, fill="black", anchor="w")
-
-        elif shape == 'Quader':
-            l_text = f"l: {info.get('l', '?')}"
-            w_text = f"b: {info.get('w', '?')}"
-            h_text = f"h: {info.get('h', '?')}"
-            canvas.create_rectangle(70, 70, 170, 130, outline="black", width=2, fill="#ddddff") # Vorne
-            canvas.create_rectangle(50, 50, 150, 110, outline="grey", width=2) # Hinten
-            canvas.create_line(70, 70, 50, 50, outline="grey")
-            canvas.create_line(170, 70, 150, 50, outline="grey")
-            canvas.create_line(70, 130, 50, 110, outline="grey")
-            canvas.create_line(170, 130, 150, 110, outline="grey")
-            canvas.create_text(120, 60, text=l_text, fill="black")
-            canvas.create_text(160, 60, text=w_text, fill="black")
-            canvas.create_text(60, 100, text=h_text, fill="black")
-
-        elif shape == 'Zylinder':
-            r_text = f"r: {info.get('r', '?')}"
-            h_text = f"h: {info.get('h', '?')}"
-            canvas.create_oval(50, 110, 170, 130, outline="black", width=2, fill="#ddddff") # Boden
-            canvas.create_line(50, 120, 50, 50, outline="black", width=2) # Seite links
-            canvas.create_line(170, 120, 170, 50, outline="black", width=2) # Seite rechts
-            canvas.create_oval(50, 40, 170, 60, outline="black", width=2, fill="#ddddff") # Deckel
-            canvas.create_line(110, 120, 110, 50, fill="grey", dash=(2, 2)) # Höhe (Mitte)
-            canvas.create_text(40, 85, text=h_text, fill="black")
-            canvas.create_text(110, 30, text=r_text, fill="black")
-
-        elif shape == 'Kegel':
-            r_text = f"r: {info.get('r', '?')}"
-            h_text = f"h: {info.get('h', '?')}"
-            canvas.create_oval(50, 110, 170, 130, outline="black", width=2, fill="#ddddff") # Boden
-            canvas.create_line(50, 120, 110, 30, outline="black", width=2) # Seite links
-            canvas.create_line(170, 120, 110, 30, outline="black", width=2) # Seite rechts
-            canvas.create_line(110, 120, 110, 30, fill="grey", dash=(2, 2)) # Höhe
-            canvas.create_text(40, 85, text=h_text, fill="black")
-            canvas.create_text(110, 100, text=r_text, fill="black")
-
-        # Statistik
-        elif shape == 'BarChart':
-            data = info.get('data', [])
-            if not data:
-                canvas.create_text(110, 75, text="Keine Daten für Skizze.")
-                canvas.pack(pady=10, padx=20)
-                return
-
-            max_val = max(data) if data else 1
-            padding = 20
-            canvas_width = 220
-            canvas_height = 150
-
-            # Achsen
-            canvas.create_line(padding, canvas_height - padding, canvas_width - padding, canvas_height - padding) # X
-
-            bar_width = (canvas_width - 2 * padding) / len(data)
-            bar_spacing = 2
-            max_bar_height = canvas_height - 2 * padding - 10 # Platz für Text
-
-            for i, val in enumerate(data):
-                x0 = padding + i * bar_width + bar_spacing
-                x1 = padding + (i + 1) * bar_width - bar_spacing
-                bar_height = (val / max_val) * max_bar_height
-                y0 = canvas_height - padding - bar_height
-                y1 = canvas_height - padding
-                canvas.create_rectangle(x0, y0, x1, y1, fill="#4a90e2", outline="black")
-                canvas.create_text((x0 + x1) / 2, y0 - 8, text=str(val), font=("Arial", 10))
-
-        else:
-            canvas.create_text(110, 75, text="Keine Skizze verfügbar.")
-
-        canvas.pack(pady=10, padx=20)
+        """Zeichnet die Geometrie- oder Statistik-Skizze auf das Canvas."""
+        _draw_cached_sketch(self._canvas, info)
+        self._canvas.pack(pady=10, padx=20, before=self._ok_button)
+
+# Ausgeblendete, wiederverwendbare Feedback-Dialoge (Toplevel-Erzeugung ist teuer)
+_feedback_pool = []
+
+def show_feedback(parent, title, is_correct, message, drawing_info=None, on_close=None):
+    """Zeigt einen Feedback-Dialog; nutzt einen ausgeblendeten Dialog desselben Fensters wieder."""
+    while _feedback_pool:
+        dialog = _feedback_pool.pop()
+        if not dialog.winfo_exists(): # Mit seinem Fenster (Sitzung) bereits zerstört
+            continue
+        if dialog.master is not parent:
+            dialog.destroy()
+            continue
+        dialog._show(parent, title, is_correct, message, drawing_info, on_close)
+        return dialog
+    return FeedbackDialog(parent, title, is_correct, message, drawing_info, on_close)
 
 # ============================
 # NEUE ZERTIFIKAT DIALOG KLASSE
 # ============================
-class ZertifikatDialog(tk.Toplevel):
+class ZertifikatDialog(_CenteredModalMixin, tk.Toplevel):
     """
     Ein modales Dialogfeld, das ein Zertifikat für einen
     bestandenen Test anzeigt.
     """
     def __init__(self, parent, class_name):
         super().__init__(parent)
+        self.withdraw() # Erst nach dem Zentrieren zeigen
         self.title("Zertifikat")
         self.transient(parent)
-        self.grab_set()
         self.config(bg="#f0f0f0")
 
         tk.Label(self, text="Herzlichen Glückwunsch",
@@ -343,51 +652,88 @@ class ZertifikatDialog(tk.Toplevel):
         # --- Grafische Darstellung (Trophäe) ---
         try:
             canvas = tk.Canvas(self, width=200, height=220, bg="#f0f0f0", highlightthickness=0)
-            # Trophäen-Basis
-            canvas.create_rectangle(70, 190, 130, 200, fill="#c0c0c0", outline="#c0c0c0") # Silber-Basis
-            canvas.create_rectangle(80, 180, 120, 190, fill="#FFD700", outline="#b8860b") # Gold-Stamm
-            # Trophäen-Kelch
-            points = [60, 100, 80, 180, 120, 180, 140, 100]
-            canvas.create_polygon(points, fill="#FFD700", outline="#b8860b", width=2)
-            # Trophäen-Henkel
-            canvas.create_arc(30, 110, 80, 160, start=0, extent=180, style=tk.ARC, outline="#FFD700", width=6)
-            canvas.create_arc(120, 110, 170, 160, start=0, extent=-180, style=tk.ARC, outline="#FFD700", width=6)
-            # Stern (Grafik)
-            canvas.create_text(100, 140, text="★", font=("Arial", 40, "bold"), fill="#FFFFFF")
+            _create_items(canvas, _trophy_items()) # Trophäe mit Stern
             canvas.pack(pady=10)
         except Exception as e:
             print(f"Fehler beim Zeichnen des Zertifikats: {e}")
             tk.Label(self, text="[Grafik konnte nicht geladen werden]", bg="#f0f0f0").pack(pady=20)
 
-        style = ttk.Style()
-        style.configure('Dialog.TButton', font=('Arial', 12))
-
         ok_button = ttk.Button(self, text="Schließen", command=self.destroy, style='Dialog.TButton')
         ok_button.pack(pady=20, ipadx=20)
 
-        # Zentrieren
-        self.update_idletasks()
-        parent_x = parent.winfo_rootx()
-        parent_y = parent.winfo_rooty()
-        parent_width = parent.winfo_width()
-        parent_height = parent.winfo_height()
-
-        dialog_width = self.winfo_width()
-        dialog_height = self.winfo_height()
-
-        x = parent_x + (parent_width // 2) - (dialog_width // 2)
-        y = parent_y + (parent_height // 2) - (dialog_height // 2)
-        self.geometry(f"+{x}+{y}")
+        self._center_and_show(parent)
         self.wait_window()
 
+class _ResultDialog(_CenteredModalMixin, tk.Toplevel):
+    """Sitzungsergebnis mit OK-Knopf (wie messagebox.showinfo); wird ein- und ausgeblendet."""
+    def __init__(self, root):
+        super().__init__(root)
+        self.withdraw()
+        self.resizable(False, False)
+        self.transient(root) # Hauptfenster bleibt bestehen, das Sitzungsfenster nicht
+        self._text = tk.StringVar(self)
+        self._closed = tk.BooleanVar(self, value=False)
+
+        tk.Label(self, textvariable=self._text, font=("Arial", 12),
+                 justify=tk.LEFT, wraplength=450).pack(padx=20, pady=15)
+        ttk.Button(self, text="OK", default="active", command=self._close).pack(pady=(0, 15), ipadx=20)
+        self.protocol("WM_DELETE_WINDOW", self._close)
+        self.bind("<Return>", lambda e: self._close()) # OK ist Standard-Taste wie bei messagebox
+        self.bind("<Escape>", lambda e: self._close())
+
+    def show(self, title, message, parent):
+        """Zeigt die Meldung zentriert über parent und wartet, bis OK gedrückt wird."""
+        self.title(title)
+        self._text.set(message)
+        self._closed.set(False)
+        self._center_and_show(parent)
+        self.lift()
+        self.focus_set()
+        self.wait_variable(self._closed)
+
+    def _close(self):
+        self.grab_release()
+        self.withdraw()
+        self._closed.set(True)
+
 # ========================
 # --- DATENBANK-VERWALTUNG ---
 # ========================
+_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S" # Format der Spalte 'timestamp'
+
+# SQL-Anweisungen (Einzel- und Mehrfachvarianten teilen sich denselben Text)
+_SQL_INSERT_RESULT = """
+INSERT INTO results (topic, class, correct_count, total_count, duration, timestamp)
+VALUES (?, ?, ?, ?, ?, ?)
+"""
+_SQL_SELECT_ALL = ("SELECT id, topic, class, correct_count, total_count, duration, timestamp "
+                   "FROM results ORDER BY timestamp DESC")
+_SQL_DELETE_RESULT = "DELETE FROM results WHERE id=?"
+_SQL_UPDATE_RESULT = """
+UPDATE results SET correct_count=?, total_count=?, duration=?
+WHERE id=?
+"""
+
 class DatabaseManager:
-    """Verwaltet die SQLite-Datenbank für Lernergebnisse."""
-    def __init__(self, db_name="mathegenie.db"):
-        self.conn = sqlite3.connect(db_name)
+    """Verwaltet die SQLite-Datenbank für Lernergebnisse.
+
+    Neue Ergebnisse schreibt ein eigener Schreib-Thread (save_result_async). Alle übrigen
+    Zugriffe warten vorher mit wait_for_writes() auf ihn, die Verbindung wird also nie
+    von zwei Threads gleichzeitig benutzt.
+    """
+
+    def __init__(self, db_name="mathegenie.db", on_write_error=None):
+        # Wird im Öffnungs-Thread angelegt und danach abwechselnd vom Schreib- und UI-Thread benutzt
+        self.conn = sqlite3.connect(db_name, check_same_thread=False)
         self.cursor = self.conn.cursor()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mathegenie-db")
+        self._last_write = None # Future des zuletzt eingereihten Schreibvorgangs
+        self._on_write_error = on_write_error # Erhält die Exception, Aufruf aus dem Schreib-Thread
+        # WAL + synchronous=NORMAL: deutlich weniger fsync() pro Schreibvorgang
+        self.cursor.execute("PRAGMA journal_mode=WAL")
+        self.cursor.execute("PRAGMA synchronous=NORMAL")
+        self.cursor.execute("PRAGMA temp_store=MEMORY") # Temporäre Sortierpuffer im Speicher
+        self.cursor.execute("PRAGMA cache_size=-8000") # 8 MB Seiten-Cache
         self._create_table()
 
     def _create_table(self):
@@ -415,201 +761,336 @@ class DatabaseManager:
                 print("Datenbank-Migration: Spalte 'class' erfolgreich hinzugefügt zu existierender Tabelle.")
             else:
                 raise
+
+        # Indizes: Übersicht nach Datum sortiert, Filter nach Klasse/Thema
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_results_ts ON results(timestamp DESC)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_results_class_topic ON results(class, topic)")
         self.conn.commit()
 
-    def save_result(self, topic, class_name, correct, total, duration):
-        """Speichert ein neues Lernergebnis, inklusive der Klasse."""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.cursor.execute("""
-        INSERT INTO results (topic, class, correct_count, total_count, duration, timestamp)
-        VALUES (?, ?, ?, ?, ?, ?)
-        """, (topic, class_name, correct, total, duration, timestamp))
+    def save_result_async(self, topic, class_name, correct, total, duration):
+        """Speichert ein neues Lernergebnis, inklusive der Klasse, im Schreib-Thread."""
+        timestamp = time.strftime(_TIMESTAMP_FORMAT) # Zeitpunkt der Abgabe, nicht des Schreibens
+        self._last_write = self._writer.submit(self._insert_result, topic, class_name, correct, total, duration, timestamp)
+        self._last_write.add_done_callback(self._report_write_error)
+
+    def _insert_result(self, topic, class_name, correct, total, duration, timestamp):
+        self.cursor.execute(_SQL_INSERT_RESULT, (topic, class_name, correct, total, duration, timestamp))
         self.conn.commit()
 
+    def _report_write_error(self, future):
+        error = future.exception()
+        if error is None:
+            return
+        if self._on_write_error is not None:
+            self._on_write_error(error)
+        else:
+            print(f"Fehler beim Speichern des Ergebnisses: {error}")
+
+    def wait_for_writes(self):
+        """Wartet, bis alle mit save_result_async eingereihten Ergebnisse geschrieben sind."""
+        if self._last_write is not None:
+            self._last_write.exception() # Blockiert bis fertig; Fehler wurden bereits gemeldet
+
     def get_all_results(self):
         """Ruft alle gespeicherten Ergebnisse ab (jetzt mit Klasse)."""
-        self.cursor.execute("SELECT id, topic, class, correct_count, total_count, duration, timestamp FROM results ORDER BY timestamp DESC")
+        self.wait_for_writes()
+        self.cursor.execute(_SQL_SELECT_ALL)
         return self.cursor.fetchall()
 
     def delete_result(self, result_id):
         """Löscht ein Ergebnis anhand der ID."""
-        self.cursor.execute("DELETE FROM results WHERE id=?", (result_id,))
-        self.conn.commit()
+        self.delete_results((result_id,))
 
     def update_result(self, result_id, new_correct, new_total, new_duration):
         """Bearbeitet ein Ergebnis anhand der ID (wird im UI simuliert)."""
-        self.cursor.execute("""
-        UPDATE results SET correct_count=?, total_count=?, duration=?
-        WHERE id=?
-        """, (new_correct, new_total, new_duration, result_id))
+        self.update_results([(new_correct, new_total, new_duration, result_id)])
+
+    def delete_results(self, result_ids):
+        """Löscht mehrere Ergebnisse mit einem Statement und einem Commit."""
+        self.wait_for_writes()
+        self.cursor.executemany(_SQL_DELETE_RESULT, [(result_id,) for result_id in result_ids])
         self.conn.commit()
 
+    def update_results(self, rows):
+        """Bearbeitet mehrere Ergebnisse; rows enthält (correct, total, duration, id)-Tupel."""
+        self.wait_for_writes()
+        self.cursor.executemany(_SQL_UPDATE_RESULT, rows)
+        self.conn.commit()
+
+# Spalten der Ergebnistabelle: (Name, Breite, dehnbar)
+_PROGRESS_COLUMNS = (
+    ("ID", 50, tk.NO), ("Thema", 150, tk.YES), ("Klasse", 100, tk.NO), ("Richtig", 150, tk.YES),
+    ("Gesamt", 150, tk.YES), ("Dauer (s)", 150, tk.YES), ("Datum", 150, tk.YES),
+)
+
 # ========================
 # --- AUFGABEN-ALGORITHMEN ---
 # ========================
+# Auswahlliste der Klassenstufen ("Klasse 1.1" ... "Klasse 13.2")
+_SCHULJAHR_OPTIONS = tuple(f"Klasse {j}.{h}" for j in range(1, 14) for h in range(1, 3))
+
+_ALL_TOPICS = (
+    "Zahlenraum-Training", "Terme & Gleichungen", "Geometrie", "Statistik",
+    "Stochastik", "Polynomdivision", "Vektor-Berechnung", "Textaufgaben"
+)
+
+# Halbjahrestest: genaue Anzahl pro Schwierigkeitsgrad (und daraus die feste Reihenfolge aller 23 Fragen)
+_HALBJAHR_SPECS = (("Leicht", 15), ("Mittel", 5), ("Schwer", 3))
+_HALBJAHR_DIFFICULTIES = tuple(difficulty for difficulty, count in _HALBJAHR_SPECS for _ in range(count))
+
+# Mindest-Semester (Gesamtsemester-Index) je Thema
+_MIN_CLASS = {
+    "Zahlenraum-Training": 1,   # Kl 1.1
+    "Textaufgaben": 1,          # Kl 1.1 (startet mit Grundschul-Aufgaben)
+    "Terme & Gleichungen": 9,   # Kl 5.1
+    "Geometrie": 9,             # Kl 5.1 (3D-Inhalte werden intern nach Jahr gesteuert)
+    "Statistik": 13,            # Kl 7.1
+    "Stochastik": 15,           # Kl 8.1
+    "Polynomdivision": 19,      # Kl 10.1
+    "Vektor-Berechnung": 19     # Kl 10.1
+}
+
+@functools.lru_cache(maxsize=32)
+def _available_topics_for(semester):
+    """Liefert die für ein Gesamtsemester freigegebenen Themen (als Tupel, gecacht)."""
+    topics = tuple(t for t in _ALL_TOPICS if semester >= _MIN_CLASS.get(t, 1))
+    return topics or ("Zahlenraum-Training",)
+
+@functools.lru_cache(maxsize=None)
+def _parse_class_name(class_name):
+    """Extrahiert Jahr und Halbjahr aus dem Klassennamen (z. B. 'Klasse 5.2' -> 5, 2)."""
+    parts = class_name.split()
+    if len(parts) > 1:
+        grade_parts = parts[1].split('.')
+        if len(grade_parts) == 2:
+            try:
+                year = int(grade_parts[0])
+                semester = int(grade_parts[1])
+                return year, semester
+            except ValueError:
+                pass
+    return 1, 1 # Standardwert, falls Fehler
+
+@functools.lru_cache(maxsize=64)
+def _compute_params(topic, difficulty, class_name):
+    """Definiert Zahlenbereiche, Operatoren und Komplexität basierend auf Klasse, Thema und Schwierigkeit.
+
+    Das Ergebnis ist unveränderlich (MappingProxyType, Operatoren als Tupel) und wird
+    pro (Thema, Schwierigkeit, Klasse) zwischengespeichert, auch über Sessions hinweg.
+    """
+    year, semester = _parse_class_name(class_name)
+
+    # 1. Basis-Parameter basierend auf Schuljahr
+    if year <= 2:
+        max_val = 100
+        base_ops = ('+', '-')
+    elif year <= 4:
+        max_val = 1000
+        base_ops = ('+', '-', '*', '/')
+    elif year <= 7:
+        max_val = 10000
+        base_ops = ('+', '-', '*', '/')
+    else: # Ab Klasse 8
+        max_val = 100000
+        base_ops = ('+', '-', '*', '/')
+
+    params = {
+        'range': (1, max_val),
+        'operators': base_ops,
+        'vars': 1,
+        'max_terms': 2,
+        'decimals': 0,
+        'allow_negatives': False
+    }
+
+    # 2. Anpassung basierend auf Schwierigkeit (NEU DEFINIERT)
+    if difficulty == "Leicht":
+        # 1-stellige Zahlen (1-9)
+        params['range'] = (1, 9)
+        params['max_terms'] = 2
+        params['decimals'] = 0
+        params['allow_negatives'] = False
+
+    elif difficulty == "Mittel":
+        # 2-stellige Zahlen (10-99)
+        lower_bound = 10
+        upper_bound = 99
+        if max_val < 10:
+            lower_bound = 1
+            upper_bound = max(1, max_val)
+        elif max_val < 99:
+            upper_bound = max_val
+
+        params['range'] = (lower_bound, upper_bound)
+        params['max_terms'] = 3
+        if year >= 5:
+            params['decimals'] = 1
+
+    elif difficulty == "Schwer":
+        # 3-stellige Zahlen (100+) bis max_val
+        lower_bound = 100
+        upper_bound = max_val
+
+        if max_val < 100:
+            lower_bound = max(10, max_val // 2)
+            upper_bound = max_val
+        if lower_bound > upper_bound:
+            lower_bound = max(1, upper_bound // 2)
+
+        params['range'] = (lower_bound, upper_bound)
+        params['max_terms'] = 4
+        if year >= 5:
+            params['decimals'] = 2
+        if year >= 7:
+            params['allow_negatives'] = True
+
+    # 3. Anpassung basierend auf Thema (Original-Logik)
+    # Für Geometrie, Statistik, Stochastik, Polynom, Vektor: Kleinere Zahlenbereiche
+    if topic not in ["Zahlenraum-Training"]:
+        current_lower, current_upper = params['range']
+
+        if difficulty == "Schwer":
+            new_upper = min(150, current_upper)
+        else:
+            new_upper = min(50, current_upper)
+
+        new_lower = min(current_lower, new_upper)
+
+        if topic in ["Polynomdivision", "Vektor-Berechnung", "Stochastik"]:
+            new_upper = min(25, current_upper) if difficulty != "Leicht" else min(9, current_upper)
+            new_lower = 1
+
+        params['range'] = (new_lower, new_upper)
+
+        if year >= 7:
+            params['allow_negatives'] = True # Erlaube negative Vektorkoordinaten etc.
+        if year >= 5:
+            params['decimals'] = 1
+
+    if difficulty == "Mittel" and topic == "Zahlenraum-Training":
+        params['decimals'] = 0
+
+    return types.MappingProxyType(params)
+
+class Question:
+    """Kompakter Datensatz einer Aufgabe."""
+    __slots__ = ('id', 'question', 'correct_answer', 'solution_steps',
+                 'user_answer', 'drawing_info', 'is_correct')
+
+    def __init__(self, question_id, question, correct_answer, solution_steps, drawing_info=None):
+        self.id = question_id
+        self.question = question
+        self.correct_answer = correct_answer
+        self.solution_steps = solution_steps # Text oder (Schlüssel, Werte) -> format_steps()
+        self.user_answer = None
+        self.drawing_info = drawing_info
+        self.is_correct = False # Wird beim Prüfen der Antwort gesetzt
+
+# Wertebereiche der Zufallsziehungen
+_URNE_RANGE = range(1, 10) # Kugeln je Farbe
+_POLY_A_RANGE = range(1, 6) # Leitkoeffizient a
+_POLY_BC_RANGE = range(-5, 6) # Koeffizienten b, c
+_POLY_VAL_RANGE = range(1, 5) # Nullstelle des Divisors (x - val)
+
 class AufgabenGenerator:
     """Erstellt mathematische Aufgaben und deren Lösungen basierend auf Thema und Schwierigkeit."""
 
+    # Konstante Tabellen
+    _OP_NAME_MAP = {'+': 'Addition', '-': 'Subtraktion', '*': 'Multiplikation', '/': 'Division'}
+    _MULTI_OPS = ('+', '-')
+    _VAR_LIST = ('x', 'y', 'a', 'b')
+    # Thema -> (Generator-Methode, liefert zusätzlich drawing_info)
+    _TOPIC_GENERATORS = {
+        "Zahlenraum-Training": ('_generate_zahlenraum', False),
+        "Terme & Gleichungen": ('_generate_terme', False),
+        "Geometrie": ('_generate_geometrie', True),
+        "Statistik": ('_generate_statistik', True),
+        "Stochastik": ('_generate_stochastik', False),
+        "Polynomdivision": ('_generate_polynomdivision', False),
+        "Vektor-Berechnung": ('_generate_vektoren', False),
+        "Textaufgaben": ('_generate_textaufgaben', True),
+    }
+
     def __init__(self, topic, difficulty, class_name, num_questions=10):
         self.topic = topic
         self.difficulty = difficulty
         self.class_name = class_name
         self.num_questions = num_questions
+        self._rng = random.Random() # Eigene Zufallsquelle
+        self._params = _compute_params(topic, difficulty, class_name)
+        self._year, self._semester = _parse_class_name(class_name)
+
+        # Von den Parametern abhängige Grenzen
+        if topic == "Geometrie":
+            max_dim = self._geom_max_dim = max(1, self._params['range'][1])
+            self._geom_dim_half = max(2, max_dim // 2)
+            self._geom_dim_third = max(2, max_dim // 3)
+            self._geom_dim_quarter = max(2, max_dim // 4)
+            self._geom_shapes = self._available_shapes(self._year)
+        elif topic == "Statistik":
+            self._stat_max_val = max(5, self._params['range'][1] // 2)
+        elif topic == "Zahlenraum-Training":
+            operators = self._params['operators']
+            if self._params['decimals'] == 0 and '/' in operators:
+                operators = tuple(o for o in operators if o != '/') # Nur 'glatte' Divisionen
+            self._zr_ops = operators or ('+', '-') # Fallback
+
         self.questions = []
         self._generate_questions()
 
-    def _parse_class(self):
-        """Extrahiert Jahr und Halbjahr aus dem Klassennamen (z. B. 'Klasse 5.2' -> 5, 2)."""
-        parts = self.class_name.split()
-        if len(parts) > 1:
-            grade_parts = parts[1].split('.')
-            if len(grade_parts) == 2:
-                try:
-                    year = int(grade_parts[0])
-                    semester = int(grade_parts[1])
-                    return year, semester
-                except ValueError:
-                    pass
-        return 1, 1 # Standardwert, falls Fehler
-
-    def _get_params(self):
-        """Definiert Zahlenbereiche, Operatoren und Komplexität basierend auf Klasse, Thema und Schwierigkeit."""
-        year, semester = self._parse_class()
-
-        # 1. Basis-Parameter basierend auf Schuljahr
-        if year <= 2:
-            max_val = 100
-            base_ops = ['+', '-']
-        elif year <= 4:
-            max_val = 1000
-            base_ops = ['+', '-', '*', '/']
-        elif year <= 7:
-            max_val = 10000
-            base_ops = ['+', '-', '*', '/']
-        else: # Ab Klasse 8
-            max_val = 100000
-            base_ops = ['+', '-', '*', '/']
-
-        params = {
-            'range': (1, max_val),
-            'operators': base_ops,
-            'vars': 1,
-            'max_terms': 2,
-            'decimals': 0,
-            'allow_negatives': False
-        }
-
-        # 2. Anpassung basierend auf Schwierigkeit (NEU DEFINIERT)
-        if self.difficulty == "Leicht":
-            # 1-stellige Zahlen (1-9)
-            params['range'] = (1, 9)
-            params['max_terms'] = 2
-            params['decimals'] = 0
-            params['allow_negatives'] = False
-
-        elif self.difficulty == "Mittel":
-            # 2-stellige Zahlen (10-99)
-            lower_bound = 10
-            upper_bound = 99
-            if max_val < 10:
-                lower_bound = 1
-                upper_bound = max(1, max_val)
-            elif max_val < 99:
-                upper_bound = max_val
-
-            params['range'] = (lower_bound, upper_bound)
-            params['max_terms'] = 3
-            if year >= 5:
-                params['decimals'] = 1
-
-        elif self.difficulty == "Schwer":
-            # 3-stellige Zahlen (100+) bis max_val
-            lower_bound = 100
-            upper_bound = max_val
-
-            if max_val < 100:
-                lower_bound = max(10, max_val // 2)
-                upper_bound = max_val
-            if lower_bound > upper_bound:
-                lower_bound = max(1, upper_bound // 2)
-
-            params['range'] = (lower_bound, upper_bound)
-            params['max_terms'] = 4
-            if year >= 5:
-                params['decimals'] = 2
-            if year >= 7:
-                params['allow_negatives'] = True
-
-        # 3. Anpassung basierend auf Thema (Original-Logik)
-        # Für Geometrie, Statistik, Stochastik, Polynom, Vektor: Kleinere Zahlenbereiche
-        if self.topic not in ["Zahlenraum-Training"]:
-            current_lower, current_upper = params['range']
-
-            if self.difficulty == "Schwer":
-                new_upper = min(150, current_upper)
-            else:
-                new_upper = min(50, current_upper)
-
-            new_lower = min(current_lower, new_upper)
-
-            if self.topic in ["Polynomdivision", "Vektor-Berechnung", "Stochastik"]:
-                new_upper = min(25, current_upper) if self.difficulty != "Leicht" else min(9, current_upper)
-                new_lower = 1
+    def _generate_questions(self):
+        """Hauptmethode zum Erstellen aller Aufgaben."""
+        entry = self._TOPIC_GENERATORS.get(self.topic)
+        if entry is None:
+            self.questions = [Question(i + 1, "Fehler: Unbekanntes Thema.", 0, "Fehler bei Generierung.", None)
+                              for i in range(self.num_questions)]
+            return
 
-            params['range'] = (new_lower, new_upper)
+        # Thema vor der Schleife auflösen
+        method_name, has_drawing = entry
+        generate = getattr(self, method_name)
+        zahlenraum_batch = None
+        if self.topic == "Zahlenraum-Training":
+            zahlenraum_batch = self._draw_zahlenraum_batch()
 
-            if year >= 7:
-                params['allow_negatives'] = True # Erlaube negative Vektorkoordinaten etc.
-            if year >= 5:
-                params['decimals'] = 1
+        if zahlenraum_batch:
+            results = [generate(row) for row in zahlenraum_batch]
+        else:
+            results = [generate() for _ in range(self.num_questions)]
 
-        if self.difficulty == "Mittel" and self.topic == "Zahlenraum-Training":
-            params['decimals'] = 0
+        if has_drawing:
+            self.questions = [Question(i, q, a, steps, drawing_info)
+                              for i, (q, a, steps, drawing_info) in enumerate(results, 1)]
+        else:
+            self.questions = [Question(i, q, a, steps) for i, (q, a, steps) in enumerate(results, 1)]
 
-        return params
+    def _draw_zahlenraum_batch(self):
+        """Zieht Zahlen und Operatoren für alle Mehrterm-Aufgaben der Session und rechnet sie aus.
+        Gibt eine Liste von (nums, ops, values) je Aufgabe zurück oder None bei zweigliedrigen Aufgaben."""
+        params = self._params
+        num_terms = params.get('max_terms', 2)
+        if num_terms <= 2:
+            return None # Zweigliedrige Aufgaben hängen vom gewählten Operator ab
 
-    def _generate_questions(self):
-        """Hauptmethode zum Erstellen aller Aufgaben."""
-        for i in range(self.num_questions):
-            q, a, steps = "", 0, "Kein Lösungsweg verfügbar."
-            drawing_info = None
-
-            if self.topic == "Zahlenraum-Training":
-                q, a, steps = self._generate_zahlenraum()
-            elif self.topic == "Terme & Gleichungen":
-                q, a, steps = self._generate_terme()
-            elif self.topic == "Geometrie":
-                q, a, steps, drawing_info = self._generate_geometrie()
-            elif self.topic == "Statistik":
-                q, a, steps, drawing_info = self._generate_statistik()
-
-            # --- NEUE THEMEN ---
-            elif self.topic == "Stochastik":
-                q, a, steps = self._generate_stochastik()
-            elif self.topic == "Polynomdivision":
-                q, a, steps = self._generate_polynomdivision()
-            elif self.topic == "Vektor-Berechnung":
-                q, a, steps = self._generate_vektoren()
-            # --- MODUL FÜR TEXTAUFGABEN HINZUGEFÜGT ---
-            elif self.topic == "Textaufgaben":
-                q, a, steps, drawing_info = self._generate_textaufgaben()
-            else:
-                q, a, steps = "Fehler: Unbekanntes Thema.", 0, "Fehler bei Generierung."
+        lower_bound, upper_bound = params['range']
+        min_val = -upper_bound if params['allow_negatives'] else lower_bound
+        num_ops = num_terms - 1
+        n = self.num_questions
 
-            self.questions.append({
-                'id': i + 1,
-                'question': q,
-                'correct_answer': a,
-                'solution_steps': steps,
-                'user_answer': None,
-                'drawing_info': drawing_info
-            })
+        allow_negatives = params['allow_negatives']
+        nums = self._rng.choices(range(min_val, upper_bound + 1), k=n * num_terms)
+        ops = self._rng.choices(self._MULTI_OPS, k=n * num_ops)
+        batch = []
+        for i in range(n):
+            row_nums = nums[i * num_terms:(i + 1) * num_terms]
+            row_ops, row_values = _arith_chain(row_nums, ops[i * num_ops:(i + 1) * num_ops], allow_negatives)
+            batch.append((row_nums, row_ops, row_values))
+        return batch
 
     # --- Themen-Algorithmen (Bestehende) ---
-    def _generate_zahlenraum(self):
-        params = self._get_params()
-        op_map = {'+': operator.add, '-': operator.sub, '*': operator.mul, '/': operator.truediv}
-        op_name_map = {'+': 'Addition', '-': 'Subtraktion', '*': 'Multiplikation', '/': 'Division'}
+    def _generate_zahlenraum(self, batch_row=None):
+        params = self._params
+        op_name_map = self._OP_NAME_MAP
 
         num_terms = params.get('max_terms', 2)
         lower_bound = params['range'][0]
@@ -618,47 +1099,35 @@ class AufgabenGenerator:
 
         if num_terms > 2:
             # Multi-Term (Punkt-vor-Strich wird hier vereinfacht)
-            multi_op_map = {'+': operator.add, '-': operator.sub}
-            ops_to_use = ['+', '-']
-            nums = []
-            for _ in range(num_terms):
+            if batch_row:
+                nums, ops, values = batch_row # Vorab gezogen und gerechnet in _draw_zahlenraum_batch
+            else:
+                # Alle Zahlen und Operatoren mit je einem Aufruf ziehen
                 min_val = -upper_bound if allow_negatives else lower_bound
-                nums.append(random.randint(min_val, upper_bound))
-
-            ops = [random.choice(ops_to_use) for _ in range(num_terms - 1)]
-            question = str(nums[0])
-            answer = nums[0]
-            steps_calc = f"1. Schritt: {nums[0]}\n"
-            current_val = nums[0]
+                nums = self._rng.choices(range(min_val, upper_bound + 1), k=num_terms)
+                ops, values = _arith_chain(nums, self._rng.choices(self._MULTI_OPS, k=num_terms - 1), allow_negatives)
 
+            # Ab hier nur noch Formatierung
+            q_parts = [str(nums[0])]
+            steps_parts = [f"1. Schritt: {nums[0]}\n"]
             for i in range(num_terms - 1):
-                op = ops[i]
-                num2 = nums[i+1]
-                if op == '-' and not allow_negatives and current_val < num2:
-                    op = '+' # Verhindere negative Zwischenergebnisse, wenn nicht erlaubt
-
-                question += f" {op} {num2}"
-                next_val = multi_op_map[op](current_val, num2)
-                steps_calc += f"{i+2}. Schritt: {format_german(current_val)} {op} {format_german(num2)} = {format_german(next_val)}\n"
-                current_val = next_val
-
-            answer = current_val
-            question += " ="
+                op, num2 = ops[i], nums[i+1]
+                q_parts.append(f" {op} {num2}")
+                steps_parts.append(f"{i+2}. Schritt: {format_german(values[i])} {op} {format_german(num2)} = {format_german(values[i+1])}\n")
+
+            answer = values[-1]
+            q_parts.append(" =")
+            question = "".join(q_parts)
+            steps_calc = "".join(steps_parts)
             steps = (
                 f"**Aufgabe:** {question}\n\n"
                 f"**Berechnung (von links nach rechts):**\n"
                 f"{steps_calc}\n"
                 f"**Ergebnis:** {format_german(answer)}"
             )
-            return question, round(answer, params['decimals']), steps
-
-        if params['decimals'] == 0 and '/' in params['operators']:
-            params['operators'].remove('/') # Nur 'glatte' Divisionen
+            return question, answer, steps # Ganzzahlige Kette, Runden entfällt
 
-        if not params['operators']:
-            params['operators'] = ['+', '-'] # Fallback
-
-        op = random.choice(params['operators'])
+        op = self._rng.choice(self._zr_ops)
         steps = ""
 
         if op == '/':
@@ -666,87 +1135,74 @@ class AufgabenGenerator:
             safe_upper = max(safe_lower + 1, upper_bound // 2)
             if safe_lower > safe_upper: safe_upper = safe_lower
 
-            answer = random.randint(safe_lower, safe_upper)
-            divisor = random.randint(2, 9)
+            answer = self._rng.randint(safe_lower, safe_upper)
+            divisor = self._rng.randint(2, 9)
             num1 = answer * divisor
             question = f"{num1} {op} {divisor} ="
-            steps = (
-                f"**Aufgabe:** {question}\n\n"
-                f"1. Schritt: Führe die {op_name_map[op]} aus.\n"
-                f" {num1} / {divisor} = {format_german(answer)}\n"
-                f"\n**Ergebnis:** {format_german(answer)}"
-            )
+            steps = ('zahlenraum', {
+                'question': question, 'op_name': op_name_map[op],
+                'num1': num1, 'op': op, 'num2': divisor, 'answer': answer})
         else:
-            num1_min = -upper_bound if params['allow_negatives'] else lower_bound
-            num1 = random.randint(num1_min, upper_bound)
-            num2_min = -upper_bound if params['allow_negatives'] else lower_bound
-            num2 = random.randint(num2_min, upper_bound)
-
-            if op == '-' and not params['allow_negatives'] and num1 < num2:
-                num1, num2 = num2, num1 # Tauschen, um negative Ergebnisse zu vermeiden
-
-            answer = op_map[op](num1, num2)
+            if op == '-' and not allow_negatives:
+                # Subtrahend zuerst ziehen, Minuend aus [num2, upper] -> nie negativ, kein Tauschen nötig
+                num2 = self._rng.randint(lower_bound, upper_bound)
+                num1 = self._rng.randint(num2, upper_bound)
+            else:
+                num_min = -upper_bound if allow_negatives else lower_bound
+                num1 = self._rng.randint(num_min, upper_bound)
+                num2 = self._rng.randint(num_min, upper_bound)
+
+            # '/' ist oben schon behandelt
+            if op == '+':
+                answer = num1 + num2
+            elif op == '-':
+                answer = num1 - num2
+            else:
+                answer = num1 * num2
             question = f"{num1} {op} {num2} ="
-            steps = (
-                f"**Aufgabe:** {question}\n\n"
-                f"1. Schritt: Führe die {op_name_map[op]} aus.\n"
-                f" {num1} {op} {num2} = {format_german(answer)}\n"
-                f"\n**Ergebnis:** {format_german(answer)}"
-            )
+            steps = ('zahlenraum', {
+                'question': question, 'op_name': op_name_map[op],
+                'num1': num1, 'op': op, 'num2': num2, 'answer': answer})
 
-        return question, round(answer, params['decimals']), steps
+        return question, answer, steps # Immer ganzzahlig ('/' nur mit glattem Ergebnis)
 
 
     def _generate_terme(self):
-        params = self._get_params()
-        var_list = ['x', 'y', 'a', 'b']
+        params = self._params
         vars_count = params.get('vars', 1)
-        vars_in_use = random.sample(var_list, vars_count)
+        vars_in_use = self._rng.sample(self._VAR_LIST, vars_count)
         max_coeff = params['range'][1]
 
+        x_val, y_val = 2, 3
+        env = {'x': x_val, 'y': y_val, 'a': x_val, 'b': y_val}
+
         term_parts = []
-        for _ in range(params['max_terms']):
-            coeff_min = -max_coeff if params['allow_negatives'] else params['range'][0]
-            coeff = random.randint(coeff_min, max_coeff)
+        term_values = [] # Zahlenwert jedes Terms (parallel zu term_parts), ersetzt eval()
+
+        # Zufallswerte für alle Terme gebündelt ziehen
+        max_terms = params['max_terms']
+        coeff_min = -max_coeff if params['allow_negatives'] else params['range'][0]
+        coeffs = self._rng.choices(range(coeff_min, max_coeff + 1), k=max_terms)
+        use_var = self._rng.choices((True, False), weights=(0.7, 0.3), k=max_terms) # 70% Chance auf Variable
+        term_vars = self._rng.choices(vars_in_use, k=max_terms) if vars_in_use else [None] * max_terms
 
-            if random.random() < 0.7 and vars_in_use: # 70% Chance auf Variable
-                var = random.choice(vars_in_use)
+        for coeff, with_var, var in zip(coeffs, use_var, term_vars):
+            if with_var and var:
                 term_parts.append(f"{coeff}{var}")
+                term_values.append(coeff * env[var])
             else:
                 term_parts.append(str(coeff))
+                term_values.append(coeff)
 
-        x_val, y_val = 2, 3
-        solution_value = 0
+        solution_value = sum(term_values)
 
-        try:
-            # Sicherer Weg, Terme auszuwerten
-            env = {'x': x_val, 'y': y_val, 'a': x_val, 'b': y_val}
-            eval_str = "".join([p if p.startswith('-') else f"+{p}" for p in term_parts])
-            solution_value = eval(eval_str, {}, env)
-        except Exception:
-            # Fallback (weniger robust)
-            for part in term_parts:
-                try:
-                    if 'x' in part: solution_value += int(part.replace('x','')) * x_val
-                    elif 'y' in part: solution_value += int(part.replace('y','')) * y_val
-                    elif 'a' in part: solution_value += int(part.replace('a','')) * x_val
-                    elif 'b' in part: solution_value += int(part.replace('b','')) * y_val
-                    else: solution_value += int(part)
-                except ValueError:
-                    continue # Z.B. bei "x" statt "1x"
-
-        term_str = " ".join([p if p.startswith('-') else f"+ {p}" for i, p in enumerate(term_parts)]).replace("+ -", "- ")
-        if term_str.startswith("+ "): term_str = term_str[2:]
+        # Erster Term ohne führendes "+ ", negative Terme behalten ihr eigenes Vorzeichen
+        term_str = " ".join([p if i == 0 or p.startswith('-') else f"+ {p}" for i, p in enumerate(term_parts)])
 
         question = f"Setze x={x_val} (und y={y_val}, falls vorhanden) ein und berechne den Termwert:\n{term_str}"
 
-        eingesetzt_str = term_str
-        for v, val in [('x', x_val), ('y', y_val), ('a', x_val), ('b', y_val)]:
-            eingesetzt_str = eingesetzt_str.replace(v, f"({val})")
-
-        # Füge Multiplikationszeichen hinzu: 5(2) -> 5 * (2)
-        eingesetzt_str = re.sub(r'(\d)\(', r'\1 * (', eingesetzt_str)
-        eingesetzt_str = eingesetzt_str.replace(" (", " * (")
+        # Alle Variablen samt Multiplikationszeichen in einem Durchlauf ersetzen: 5x -> 5 * (2)
+        eingesetzt_str = _VAR_RE.sub(_sub_var, term_str)
 
         steps = (
             f"**Aufgabe:** {question}\n\n"
@@ -762,279 +1218,289 @@ class AufgabenGenerator:
         return question, round(solution_value, params['decimals']), steps
 
     # --- MODIFIZIERT: GEOMETRIE (2D & 3D) ---
-    def _generate_geometrie(self):
-        """Erstellt geometrische Aufgaben (2D und 3D).
-        Gibt (q, a, steps, drawing_info) zurück."""
-        params = self._get_params()
-        year, _ = self._parse_class()
-
-        available_shapes = ['Rechteck', 'Kreis', 'Dreieck']
+    @staticmethod
+    def _available_shapes(year):
+        """Formen, die für die Klassenstufe freigeschaltet sind."""
+        shapes = ['Rechteck', 'Kreis', 'Dreieck']
         if year >= 6: # Ab Klasse 6 Trapez etc.
-            available_shapes.append('Trapez')
+            shapes.append('Trapez')
         if year >= 7: # Ab Klasse 7 3D
-            available_shapes.extend(['Würfel', 'Kugel', 'Quader', 'Zylinder', 'Kegel'])
-
-        shape = random.choice(available_shapes)
-        unit = "cm"
-
-        max_dim = max(1, params['range'][1])
-        if max_dim <= 0: max_dim = 1
-
-        question, answer, steps = "", 0, ""
-        drawing_info = None
-        pi_val = 3.14159 # math.pi
-
-        if shape == 'Rechteck':
-            length = random.randint(1, max_dim)
-            width = random.randint(1, length)
-            drawing_info = {'shape': 'Rechteck', 'l': length, 'w': width}
-            q_type = random.choice(['Umfang', 'Fläche'])
-
-            if q_type == 'Umfang':
-                question = f"Berechne den Umfang eines Rechtecks mit Länge {length}{unit} und Breite {width}{unit}."
-                answer = 2 * (length + width)
-                steps = (f"**Aufgabe:** {question}\n\n"
-                         f"1. Formel: U = 2 * (l + w)\n"
-                         f"2. Einsatz: U = 2 * ({length} + {width}) = {format_german(answer)}\n\n"
-                         f"**Ergebnis:** {format_german(answer)} {unit}")
-            else: # Fläche
-                question = f"Berechne die Fläche eines Rechtecks mit Länge {length}{unit} und Breite {width}{unit}."
-                answer = length * width
-                steps = (f"**Aufgabe:** {question}\n\n"
-                         f"1. Formel: A = l * w\n"
-                         f"2. Einsatz: A = {length} * {width} = {format_german(answer)}\n\n"
-                         f"**Ergebnis:** {format_german(answer)} {unit}²")
-
-            return question, round(answer, params['decimals']), steps, drawing_info
-
-        elif shape == 'Kreis':
-            radius = random.randint(1, max(2, max_dim // 2))
-            drawing_info = {'shape': 'Kreis', 'r': radius}
-            q_type = random.choice(['Umfang', 'Fläche'])
-
-            if q_type == 'Umfang':
-                question = f"Berechne den Umfang eines Kreises mit Radius {radius}{unit}. Runde auf {params['decimals']} Nachkommastellen (Pi={pi_val:.4f})."
-                answer = 2 * pi_val * radius
-                steps = (f"**Aufgabe:** {question}\n\n"
-                         f"1. Formel: U = 2 * Pi * r\n"
-                         f"2. Einsatz: U = 2 * {pi_val:.4f} * {radius} ≈ {format_german(answer)}\n\n"
-                         f"**Ergebnis (gerundet):** {format_german(round(answer, params['decimals']))} {unit}")
-            else: # Fläche
-                question = f"Berechne die Fläche eines Kreises mit Radius {radius}{unit}. Runde auf {params['decimals']} Nachkommastellen (Pi={pi_val:.4f})."
-                answer = pi_val * (radius ** 2)
-                steps = (f"**Aufgabe:** {question}\n\n"
-                         f"1. Formel: A = Pi * r²\n"
-                         f"2. Einsatz: A = {pi_val:.4f} * {radius}² = {format_german(answer)}\n\n"
-                         f"**Ergebnis (gerundet):** {format_german(round(answer, params['decimals']))} {unit}²")
-
-            return question, round(answer, params['decimals']), steps, drawing_info
-
-        elif shape == 'Dreieck': # Dreieck (Fläche)
-            base = random.randint(1, max_dim)
-            height = random.randint(1, max(2, base))
-            drawing_info = {'shape': 'Dreieck', 'b': base, 'h': height}
-
-            question = f"Berechne die Fläche eines Dreiecks mit Grundseite {base}{unit} und Höhe {height}{unit}."
-            answer = 0.5 * base * height
-            steps = (f"**Aufgabe:** {question}\n\n"
-                     f"1. Formel: A = 0.5 * g * h\n"
-                     f"2. Einsatz: A = 0.5 * {base} * {height} = {format_german(answer)}\n\n"
-                     f"**Ergebnis:** {format_german(answer)} {unit}²")
-
-            return question, round(answer, params['decimals']), steps, drawing_info
-
-        elif shape == 'Trapez':
-            a = random.randint(1, max_dim)
-            c = random.randint(1, a)
-            h = random.randint(1, max_dim)
-            drawing_info = {'shape': 'Trapez', 'a': a, 'c': c, 'h': h}
-
-            question = f"Berechne die Fläche eines Trapez mit Seiten a={a}{unit}, c={c}{unit} und Höhe h={h}{unit}."
-            answer = ((a+c)/2) * h
-            steps = (f"**Aufgabe:** {question}\n\n"
-                     f"1. Formel: A = ((a + c) / 2) * h\n"
-                     f"2. Einsatz: A = (({a} + {c}) / 2) * {h}\n"
-                     f"   A = ({ (a+c)/2 }) * {h} = {format_german(answer)}\n\n"
-                     f"**Ergebnis:** {format_german(answer)} {unit}²")
-
-            return question, round(answer, params['decimals']), steps, drawing_info
-
-        # --- NEUE 3D-KÖRPER ---
-        elif shape == 'Würfel':
-            a = random.randint(1, max(2, max_dim // 4))
-            drawing_info = {'shape': 'Würfel', 'a': a}
-            q_type = random.choice(['Volumen', 'Oberfläche'])
-
-            if q_type == 'Volumen':
-                question = f"Berechne das Volumen (V) eines Würfels mit Seitenlänge a = {a}{unit}."
-                answer = a ** 3
-                steps = (f"**Aufgabe:** {question}\n\n"
-                         f"1. Formel: V = a³\n"
-                         f"2. Einsatz: V = {a}³ = {format_german(answer)}\n\n"
-                         f"**Ergebnis:** {format_german(answer)} {unit}³")
-            else: # Oberfläche
-                question = f"Berechne die Oberfläche (O) eines Würfels mit Seitenlänge a = {a}{unit}."
-                answer = 6 * (a ** 2)
-                steps = (f"**Aufgabe:** {question}\n\n"
-                         f"1. Formel: O = 6 * a²\n"
-                         f"2. Einsatz: O = 6 * {a}² = 6 * {a**2} = {format_german(answer)}\n\n"
-                         f"**Ergebnis:** {format_german(answer)} {unit}²")
-
-            return question, round(answer, params['decimals']), steps, drawing_info
-
-        elif shape == 'Quader':
-            l = random.randint(1, max(2, max_dim // 3))
-            w = random.randint(1, max(2, max_dim // 3))
-            h = random.randint(1, max(2, max_dim // 3))
-            drawing_info = {'shape': 'Quader', 'l': l, 'w': w, 'h': h}
-            q_type = random.choice(['Volumen', 'Oberfläche'])
-
-            if q_type == 'Volumen':
-                question = f"Berechne das Volumen (V) eines Quaders (l={l}, b={w}, h={h}){unit}."
-                answer = l * w * h
-                steps = (f"**Aufgabe:** {question}\n\n"
-                         f"1. Formel: V = l * b * h\n"
-                         f"2. Einsatz: V = {l} * {w} * {h} = {format_german(answer)}\n\n"
-                         f"**Ergebnis:** {format_german(answer)} {unit}³")
-            else: # Oberfläche
-                question = f"Berechne die Oberfläche (O) eines Quaders (l={l}, b={w}, h={h}){unit}."
-                answer = 2 * (l*w + l*h + w*h)
-                steps = (f"**Aufgabe:** {question}\n\n"
-                         f"1. Formel: O = 2 * (lb + lh + bh)\n"
-                         f"2. Einsatz: O = 2 * ({l}*{w} + {l}*{h} + {w}*{h})\n"
-                         f"   O = 2 * ({l*w} + {l*h} + {w*h}) = {format_german(answer)}\n\n"
-                         f"**Ergebnis:** {format_german(answer)} {unit}²")
-
-            return question, round(answer, params['decimals']), steps, drawing_info
-
-        elif shape == 'Zylinder':
-            radius = random.randint(1, max(2, max_dim // 4))
-            height = random.randint(1, max(2, max_dim // 2))
-            drawing_info = {'shape': 'Zylinder', 'r': radius, 'h': height}
-            q_type = random.choice(['Volumen', 'Oberfläche'])
-
-            if q_type == 'Volumen':
-                question = f"Berechne das Volumen (V) eines Zylinders (r={radius}, h={height}){unit}. Runde auf {params['decimals']} Nachkommastellen (Pi={pi_val:.4f})."
-                answer = pi_val * (radius**2) * height
-                steps = (f"**Aufgabe:** {question}\n\n"
-                         f"1. Formel: V = Pi * r² * h\n"
-                         f"2. Einsatz: V = {pi_val:.4f} * {radius}² * {height} ≈ {format_german(answer)}\n\n"
-                         f"**Ergebnis (gerundet):** {format_german(round(answer, params['decimals']))} {unit}³")
-            else: # Oberfläche (Mantel + 2*Grundfläche)
-                question = f"Berechne die Oberfläche (O) eines Zylinders (r={radius}, h={height}){unit}. Runde auf {params['decimals']} Nachkommastellen (Pi={pi_val:.4f})."
-                answer = (2 * pi_val * radius * height) + (2 * pi_val * (radius**2))
-                steps = (f"**Aufgabe:** {question}\n\n"
-                         f"1. Formel: O = 2*Pi*r*h (Mantel) + 2*Pi*r² (Deckel/Boden)\n"
-                         f"2. Einsatz: O = (2*{pi_val:.4f}*{radius}*{height}) + (2*{pi_val:.4f}*{radius}²) ≈ {format_german(answer)}\n\n"
-                         f"**Ergebnis (gerundet):** {format_german(round(answer, params['decimals']))} {unit}²")
-
-            return question, round(answer, params['decimals']), steps, drawing_info
-
-        elif shape == 'Kegel':
-            radius = random.randint(1, max(2, max_dim // 4))
-            height = random.randint(1, max(2, max_dim // 2))
-            drawing_info = {'shape': 'Kegel', 'r': radius, 'h': height}
-
-            # Für Oberfläche 's' (Seitenlinie)
-            s = math.sqrt(radius**2 + height**2)
-
-            q_type = random.choice(['Volumen', 'Oberfläche'])
-
-            if q_type == 'Volumen':
-                question = f"Berechne das Volumen (V) eines Kegels (r={radius}, h={height}){unit}. Runde auf {params['decimals']} Nachkommastellen (Pi={pi_val:.4f})."
-                answer = (1/3) * pi_val * (radius**2) * height
-                steps = (f"**Aufgabe:** {question}\n\n"
-                         f"1. Formel: V = (1/3) * Pi * r² * h\n"
-                         f"2. Einsatz: V = (1/3) * {pi_val:.4f} * {radius}² * {height} ≈ {format_german(answer)}\n\n"
-                         f"**Ergebnis (gerundet):** {format_german(round(answer, params['decimals']))} {unit}³")
-            else: # Oberfläche
-                question = f"Berechne die Oberfläche (O) eines Kegels (r={radius}, h={height}){unit}. Runde auf {params['decimals']} Nachkommastellen (Pi={pi_val:.4f})."
-                answer = (pi_val * radius**2) + (pi_val * radius * s)
-                steps = (f"**Aufgabe:** {question}\n\n"
-                         f"1. Formel: O = Pi*r² (Grundfläche) + Pi*r*s (Mantel)\n"
-                         f"2. Seitenlinie s = √(r² + h²) = √({radius}² + {height}²) ≈ {s:.2f}\n"
-                         f"3. Einsatz: O = ({pi_val:.4f} * {radius}²) + ({pi_val:.4f} * {radius} * {s:.2f}) ≈ {format_german(answer)}\n\n"
-                         f"**Ergebnis (gerundet):** {format_german(round(answer, params['decimals']))} {unit}²")
-
-            return question, round(answer, params['decimals']), steps, drawing_info
-
-        elif shape == 'Kugel':
-            radius = random.randint(1, max(2, max_dim // 4))
-            drawing_info = {'shape': 'Kugel', 'r': radius}
-            q_type = random.choice(['Volumen', 'Oberfläche'])
-
-            if q_type == 'Volumen':
-                question = f"Berechne das Volumen (V) einer Kugel mit Radius r = {radius}{unit}. Runde auf {params['decimals']} Nachkommastellen (Pi={pi_val:.4f})."
-                answer = (4/3) * pi_val * (radius ** 3)
-                steps = (f"**Aufgabe:** {question}\n\n"
-                         f"1. Formel: V = (4/3) * Pi * r³\n"
-                         f"2. Einsatz: V = (4/3) * {pi_val:.4f} * {radius}³ ≈ {format_german(answer)}\n\n"
-                         f"**Ergebnis (gerundet):** {format_german(round(answer, params['decimals']))} {unit}³")
-            else: # Oberfläche
-                question = f"Berechne die Oberfläche (O) einer Kugel mit Radius r = {radius}{unit}. Runde auf {params['decimals']} Nachkommastellen (Pi={pi_val:.4f})."
-                answer = 4 * pi_val * (radius ** 2)
-                steps = (f"**Aufgabe:** {question}\n\n"
-                         f"1. Formel: O = 4 * Pi * r²\n"
-                         f"2. Einsatz: O = 4 * {pi_val:.4f} * {radius}² ≈ {format_german(answer)}\n\n"
-                         f"**Ergebnis (gerundet):** {format_german(round(answer, params['decimals']))} {unit}²")
-
-            return question, round(answer, params['decimals']), steps, drawing_info
-
-        # Fallback
-        return "Geometrie-Fehler", 0, "Fehler", None
+            shapes.extend(['Würfel', 'Kugel', 'Quader', 'Zylinder', 'Kegel'])
+        return tuple(shapes)
 
+    def _generate_geometrie(self):
+        """Erstellt geometrische Aufgaben (2D und 3D).
+        Gibt (q, a, steps, drawing_info) zurück."""
+        shape = self._rng.choice(self._geom_shapes)
+        return self._GEOM_HANDLERS[shape](self)
+
+    def _geom_rechteck(self):
+        """Rechteck: Umfang oder Fläche."""
+        randint, getrandbits = self._rng.randint, self._rng.getrandbits
+        unit = _GEOM_UNIT
+        max_dim = self._geom_max_dim
+
+        length = randint(1, max_dim)
+        width = randint(1, length)
+        drawing_info = {'shape': 'Rechteck', 'l': length, 'w': width}
+        q_type = ('Umfang', 'Fläche')[getrandbits(1)]
+
+        if q_type == 'Umfang':
+            question = f"Berechne den Umfang eines Rechtecks mit Länge {length}{unit} und Breite {width}{unit}."
+            answer = 2 * (length + width)
+            steps = ('rechteck_umfang', {
+                'question': question, 'length': length, 'width': width,
+                'answer': answer, 'unit': unit})
+        else: # Fläche
+            question = f"Berechne die Fläche eines Rechtecks mit Länge {length}{unit} und Breite {width}{unit}."
+            answer = length * width
+            steps = ('rechteck_flaeche', {
+                'question': question, 'length': length, 'width': width,
+                'answer': answer, 'unit': unit})
+
+        return question, answer, steps, drawing_info # Ganzzahlig, Runden entfällt
+
+    def _geom_kreis(self):
+        """Kreis: Umfang oder Fläche."""
+        params = self._params
+        randint, getrandbits = self._rng.randint, self._rng.getrandbits
+        unit = _GEOM_UNIT
+
+        radius = randint(1, self._geom_dim_half)
+        drawing_info = {'shape': 'Kreis', 'r': radius}
+        q_type = ('Umfang', 'Fläche')[getrandbits(1)]
+
+        if q_type == 'Umfang':
+            question = f"Berechne den Umfang eines Kreises mit Radius {radius}{unit}. Runde auf {params['decimals']} Nachkommastellen (Pi={_PI_STR})."
+            answer = 2 * _PI * radius
+            steps = ('kreis_umfang', {
+                'question': question, 'radius': radius, 'answer': answer,
+                'answer_rounded': round(answer, params['decimals']), 'unit': unit})
+        else: # Fläche
+            question = f"Berechne die Fläche eines Kreises mit Radius {radius}{unit}. Runde auf {params['decimals']} Nachkommastellen (Pi={_PI_STR})."
+            answer = _PI * (radius ** 2)
+            steps = ('kreis_flaeche', {
+                'question': question, 'radius': radius, 'answer': answer,
+                'answer_rounded': round(answer, params['decimals']), 'unit': unit})
+
+        return question, round(answer, params['decimals']), steps, drawing_info
+
+    def _geom_dreieck(self):
+        """Dreieck: Fläche."""
+        params = self._params
+        randint = self._rng.randint
+        unit = _GEOM_UNIT
+        max_dim = self._geom_max_dim
+
+        base = randint(1, max_dim)
+        height = randint(1, max(2, base))
+        drawing_info = {'shape': 'Dreieck', 'b': base, 'h': height}
+
+        question = f"Berechne die Fläche eines Dreiecks mit Grundseite {base}{unit} und Höhe {height}{unit}."
+        answer = 0.5 * base * height
+        steps = ('dreieck_flaeche', {
+            'question': question, 'base': base, 'height': height, 'answer': answer, 'unit': unit})
+
+        return question, round(answer, params['decimals']), steps, drawing_info
+
+    def _geom_trapez(self):
+        """Trapez: Fläche."""
+        params = self._params
+        randint = self._rng.randint
+        unit = _GEOM_UNIT
+        max_dim = self._geom_max_dim
+
+        a = randint(1, max_dim)
+        c = randint(1, a)
+        h = randint(1, max_dim)
+        drawing_info = {'shape': 'Trapez', 'a': a, 'c': c, 'h': h}
+
+        question = f"Berechne die Fläche eines Trapez mit Seiten a={a}{unit}, c={c}{unit} und Höhe h={h}{unit}."
+        answer = ((a+c)/2) * h
+        steps = ('trapez_flaeche', {
+            'question': question, 'a': a, 'c': c, 'h': h, 'half': (a+c)/2, 'answer': answer, 'unit': unit})
+
+        return question, round(answer, params['decimals']), steps, drawing_info
+
+    def _geom_wuerfel(self):
+        """Würfel: Volumen oder Oberfläche."""
+        randint, getrandbits = self._rng.randint, self._rng.getrandbits
+        unit = _GEOM_UNIT
+
+        a = randint(1, self._geom_dim_quarter)
+        drawing_info = {'shape': 'Würfel', 'a': a}
+        q_type = ('Volumen', 'Oberfläche')[getrandbits(1)]
+
+        if q_type == 'Volumen':
+            question = f"Berechne das Volumen (V) eines Würfels mit Seitenlänge a = {a}{unit}."
+            answer = a ** 3
+            steps = ('wuerfel_volumen', {'question': question, 'a': a, 'answer': answer, 'unit': unit})
+        else: # Oberfläche
+            question = f"Berechne die Oberfläche (O) eines Würfels mit Seitenlänge a = {a}{unit}."
+            answer = 6 * (a ** 2)
+            steps = ('wuerfel_oberflaeche', {
+                'question': question, 'a': a, 'a_sq': a**2, 'answer': answer, 'unit': unit})
+
+        return question, answer, steps, drawing_info # Ganzzahlig, Runden entfällt
+
+    def _geom_quader(self):
+        """Quader: Volumen oder Oberfläche."""
+        randint, getrandbits = self._rng.randint, self._rng.getrandbits
+        unit = _GEOM_UNIT
+
+        l = randint(1, self._geom_dim_third)
+        w = randint(1, self._geom_dim_third)
+        h = randint(1, self._geom_dim_third)
+        drawing_info = {'shape': 'Quader', 'l': l, 'w': w, 'h': h}
+        q_type = ('Volumen', 'Oberfläche')[getrandbits(1)]
+
+        if q_type == 'Volumen':
+            question = f"Berechne das Volumen (V) eines Quaders (l={l}, b={w}, h={h}){unit}."
+            answer = l * w * h
+            steps = ('quader_volumen', {'question': question, 'l': l, 'w': w, 'h': h, 'answer': answer, 'unit': unit})
+        else: # Oberfläche
+            question = f"Berechne die Oberfläche (O) eines Quaders (l={l}, b={w}, h={h}){unit}."
+            answer = 2 * (l*w + l*h + w*h)
+            steps = ('quader_oberflaeche', {
+                'question': question, 'l': l, 'w': w, 'h': h, 'lw': l*w, 'lh': l*h, 'wh': w*h,
+                'answer': answer, 'unit': unit})
+
+        return question, answer, steps, drawing_info # Ganzzahlig, Runden entfällt
+
+    def _geom_zylinder(self):
+        """Zylinder: Volumen oder Oberfläche."""
+        params = self._params
+        randint, getrandbits = self._rng.randint, self._rng.getrandbits
+        unit = _GEOM_UNIT
+
+        radius = randint(1, self._geom_dim_quarter)
+        height = randint(1, self._geom_dim_half)
+        drawing_info = {'shape': 'Zylinder', 'r': radius, 'h': height}
+        q_type = ('Volumen', 'Oberfläche')[getrandbits(1)]
+
+        if q_type == 'Volumen':
+            question = f"Berechne das Volumen (V) eines Zylinders (r={radius}, h={height}){unit}. Runde auf {params['decimals']} Nachkommastellen (Pi={_PI_STR})."
+            answer = _PI * (radius**2) * height
+            steps = ('zylinder_volumen', {
+                'question': question, 'radius': radius, 'height': height, 'answer': answer,
+                'answer_rounded': round(answer, params['decimals']), 'unit': unit})
+        else: # Oberfläche (Mantel + 2*Grundfläche)
+            question = f"Berechne die Oberfläche (O) eines Zylinders (r={radius}, h={height}){unit}. Runde auf {params['decimals']} Nachkommastellen (Pi={_PI_STR})."
+            answer = (2 * _PI * radius * height) + (2 * _PI * (radius**2))
+            steps = ('zylinder_oberflaeche', {
+                'question': question, 'radius': radius, 'height': height, 'answer': answer,
+                'answer_rounded': round(answer, params['decimals']), 'unit': unit})
+
+        return question, round(answer, params['decimals']), steps, drawing_info
+
+    def _geom_kegel(self):
+        """Kegel: Volumen oder Oberfläche."""
+        params = self._params
+        randint, getrandbits = self._rng.randint, self._rng.getrandbits
+        unit = _GEOM_UNIT
+
+        radius = randint(1, self._geom_dim_quarter)
+        height = randint(1, self._geom_dim_half)
+        drawing_info = {'shape': 'Kegel', 'r': radius, 'h': height}
+
+        # Für Oberfläche 's' (Seitenlinie)
+        s = math.sqrt(radius**2 + height**2)
+
+        q_type = ('Volumen', 'Oberfläche')[getrandbits(1)]
+
+        if q_type == 'Volumen':
+            question = f"Berechne das Volumen (V) eines Kegels (r={radius}, h={height}){unit}. Runde auf {params['decimals']} Nachkommastellen (Pi={_PI_STR})."
+            answer = (1/3) * _PI * (radius**2) * height
+            steps = ('kegel_volumen', {
+                'question': question, 'radius': radius, 'height': height, 'answer': answer,
+                'answer_rounded': round(answer, params['decimals']), 'unit': unit})
+        else: # Oberfläche
+            question = f"Berechne die Oberfläche (O) eines Kegels (r={radius}, h={height}){unit}. Runde auf {params['decimals']} Nachkommastellen (Pi={_PI_STR})."
+            answer = (_PI * radius**2) + (_PI * radius * s)
+            steps = ('kegel_oberflaeche', {
+                'question': question, 'radius': radius, 'height': height, 's': s, 'answer': answer,
+                'answer_rounded': round(answer, params['decimals']), 'unit': unit})
+
+        return question, round(answer, params['decimals']), steps, drawing_info
+
+    def _geom_kugel(self):
+        """Kugel: Volumen oder Oberfläche."""
+        params = self._params
+        randint, getrandbits = self._rng.randint, self._rng.getrandbits
+        unit = _GEOM_UNIT
+
+        radius = randint(1, self._geom_dim_quarter)
+        drawing_info = {'shape': 'Kugel', 'r': radius}
+        q_type = ('Volumen', 'Oberfläche')[getrandbits(1)]
+
+        if q_type == 'Volumen':
+            question = f"Berechne das Volumen (V) einer Kugel mit Radius r = {radius}{unit}. Runde auf {params['decimals']} Nachkommastellen (Pi={_PI_STR})."
+            answer = (4/3) * _PI * (radius ** 3)
+            steps = ('kugel_volumen', {
+                'question': question, 'radius': radius, 'answer': answer,
+                'answer_rounded': round(answer, params['decimals']), 'unit': unit})
+        else: # Oberfläche
+            question = f"Berechne die Oberfläche (O) einer Kugel mit Radius r = {radius}{unit}. Runde auf {params['decimals']} Nachkommastellen (Pi={_PI_STR})."
+            answer = 4 * _PI * (radius ** 2)
+            steps = ('kugel_oberflaeche', {
+                'question': question, 'radius': radius, 'answer': answer,
+                'answer_rounded': round(answer, params['decimals']), 'unit': unit})
+
+        return question, round(answer, params['decimals']), steps, drawing_info
+
+    # Form -> Aufgaben-Methode
+    _GEOM_HANDLERS = {
+        'Rechteck': _geom_rechteck,
+        'Kreis': _geom_kreis,
+        'Dreieck': _geom_dreieck,
+        'Trapez': _geom_trapez,
+        'Würfel': _geom_wuerfel,
+        'Quader': _geom_quader,
+        'Zylinder': _geom_zylinder,
+        'Kegel': _geom_kegel,
+        'Kugel': _geom_kugel,
+    }
 
     def _generate_statistik(self):
-        params = self._get_params()
-        data_size = random.randint(5, 10)
-        max_data_val = max(1, max(5, params['range'][1] // 2))
-        data = [random.randint(1, max_data_val) for _ in range(data_size)]
+        params = self._params
+        data_size = self._rng.randint(5, 10)
+        max_data_val = self._stat_max_val
+        data = self._rng.choices(range(1, max_data_val + 1), k=data_size)
 
         drawing_info = {'shape': 'BarChart', 'data': data}
 
-        q_type = random.choice(['Mittelwert', 'Median'])
+        q_type = ('Mittelwert', 'Median')[self._rng.getrandbits(1)]
         question, answer, steps = "", 0, ""
+        data_sum, data_mean, data_sorted, data_median = _stats_kernel(data)
+        data_strs = [str(x) for x in data]
+        data_list_str = ', '.join(data_strs)
 
         if q_type == 'Mittelwert':
-            question = f"Berechne den Mittelwert der folgenden Datenreihe: {', '.join(map(str, data))}. Runde auf {params['decimals']} Nachkommastelle(n)."
-            answer = sum(data) / len(data)
-            steps = (
-                f"**Aufgabe:** {question}\n\n"
-                f"1. Schritt: Formel für Mittelwert (MW) notieren.\n"
-                f"   - MW = (Summe aller Werte) / (Anzahl der Werte)\n"
-                f"2. Schritt: Alle Werte addieren.\n"
-                f"   - Summe = {' + '.join(map(str, data))} = {sum(data)}\n"
-                f"3. Schritt: Anzahl der Werte zählen.\n"
-                f"   - Anzahl = {len(data)}\n"
-                f"4. Schritt: Dividieren.\n"
-                f"   - MW = {sum(data)} / {len(data)} = {format_german(answer)}\n\n"
-                f"**Ergebnis (gerundet):** {format_german(round(answer, params['decimals']))}"
-            )
+            question = f"Berechne den Mittelwert der folgenden Datenreihe: {data_list_str}. Runde auf {params['decimals']} Nachkommastelle(n)."
+            answer = data_mean
+            steps = ('mittelwert', {
+                'question': question, 'summanden': ' + '.join(data_strs),
+                'data_sum': data_sum, 'n': len(data), 'answer': answer,
+                'answer_rounded': round(answer, params['decimals'])})
 
             return question, round(answer, params['decimals']), steps, drawing_info
 
         else: # Median
-            data_sorted = sorted(data)
-            question = f"Berechne den Median der folgenden Datenreihe: {', '.join(map(str, data))}."
+            question = f"Berechne den Median der folgenden Datenreihe: {data_list_str}."
             n = len(data_sorted)
 
-            steps = (
-                f"**Aufgabe:** {question}\n\n"
-                f"1. Schritt: Datenreihe der Größe nach ordnen.\n"
-                f"   - Original: {', '.join(map(str, data))}\n"
-                f"   - Sortiert: {', '.join(map(str, data_sorted))}\n"
-                f"2. Schritt: Anzahl der Werte bestimmen: n = {n}.\n"
-            )
+            steps = _STEPS_MEDIAN_KOPF.format_map({
+                'question': question, 'original': data_list_str,
+                'sortiert': ', '.join(map(str, data_sorted)), 'n': n})
 
+            answer = data_median
             if n % 2 == 1: # Ungerade Anzahl
-                answer = data_sorted[n//2]
                 steps += (
                     f"3. Schritt (n ist ungerade): Der Wert in der Mitte ist der Median.\n"
                     f"   - Position: (n+1)/2 = {(n+1)//2}. Wert\n"
                     f"   - Median = {format_german(answer)}\n"
                 )
             else: # Gerade Anzahl
-                answer = (data_sorted[n//2 - 1] + data_sorted[n//2]) / 2
                 steps += (
                     f"3. Schritt (n ist gerade): Der Durchschnitt der beiden mittleren Werte ist der Median.\n"
                     f"   - Mittlere Werte (Position {n//2} und {n//2 + 1}): {data_sorted[n//2 - 1]} und {data_sorted[n//2]}\n"
@@ -1046,12 +1512,12 @@ class AufgabenGenerator:
 
     # --- NEUE GENERATOREN ---
     def _generate_stochastik(self):
-        params = self._get_params()
-        q_type = random.choice(['Wuerfel', 'Urne'])
+        params = self._params
+        q_type = ('Wuerfel', 'Urne')[self._rng.getrandbits(1)]
 
         if q_type == 'Wuerfel':
             n = 6 # Standard W6
-            event_n = random.randint(1, 5)
+            event_n = self._rng.randint(1, 5)
 
             question = (f"Ein idealer 6-seitiger Würfel (W6) wird einmal geworfen.\n"
                         f"Wie groß ist die Wahrscheinlichkeit P(Ergebnis <= {event_n})? "
@@ -1065,8 +1531,7 @@ class AufgabenGenerator:
                      f"**Ergebnis (gerundet):** {format_german(round(answer, params['decimals']))}")
 
         else: # Urne
-            r = random.randint(1, 9)
-            b = random.randint(1, 9)
+            r, b = self._rng.choices(_URNE_RANGE, k=2) # Rote und blaue Kugeln gemeinsam ziehen
             total = r + b
             question = (f"In einer Urne befinden sich {r} rote und {b} blaue Kugeln. Es wird einmal gezogen.\n"
                         f"Wie groß ist die Wahrscheinlichkeit P(rot)? "
@@ -1082,21 +1547,17 @@ class AufgabenGenerator:
         return question, round(answer, params['decimals']), steps
 
     def _generate_polynomdivision(self):
-        params = self._get_params()
-
-        # P(x) = ax^2 + bx + c
-        a = random.randint(1, 5)
-        b = random.randint(-5, 5)
-        c = random.randint(-5, 5)
-
-        # Divisor (x - val)
-        val = random.randint(1, 4)
+        # P(x) = ax^2 + bx + c, Divisor (x - val)
+        a = self._rng.choice(_POLY_A_RANGE)
+        b, c = self._rng.choices(_POLY_BC_RANGE, k=2)
+        val = self._rng.choice(_POLY_VAL_RANGE)
 
         polynom_str = f"{a}x² + {b}x + {c}".replace("+ -", "- ")
         divisor_str = f"(x - {val})"
 
-        # Antwort nach Satz vom Rest: P(val)
-        answer = a * (val**2) + b * val + c
+        # Antwort nach Satz vom Rest: P(val), im Horner-Schema ((a*val + b)*val + c)
+        horner = a * val + b # Zwischenwert, auch für den Lösungsweg
+        answer = horner * val + c
 
         question = (f"Berechnen Sie den **Rest** der folgenden Polynomdivision:\n\n"
                     f"({polynom_str}) : {divisor_str}")
@@ -1108,41 +1569,43 @@ class AufgabenGenerator:
                  f"3. Divisor (x - {val}). Der Wert 'a' ist also {val}.\n"
                  f"4. Setze a = {val} in P(x) ein:\n"
                  f"   Rest = P({val}) = {a}*({val}²) + {b}*({val}) + {c}\n"
-                 f"   Rest = {a}*({val**2}) + {b*val} + {c}\n"
-                 f"   Rest = {a * (val**2)} + {b*val} + {c} = {format_german(answer)}\n\n"
+                 f"   Horner-Schema: Rest = ({a}*({val}) + {b})*({val}) + {c}\n"
+                 f"   Rest = {horner}*({val}) + {c} = {format_german(answer)}\n\n"
                  f"**Ergebnis (Rest):** {format_german(answer)}")
 
-        return question, round(answer, params['decimals']), steps
+        return question, answer, steps # Ganzzahliger Rest
 
     def _generate_vektoren(self):
-        params = self._get_params()
+        params = self._params
+        randint = self._rng.randint # Lokale Bindung für die Listen-Comprehensions
 
         # 2D (Leicht/Mittel) oder 3D (Schwer)
         dim = 3 if self.difficulty == "Schwer" else 2
 
         # Vektor 1
-        v1 = [random.randint(params['range'][0], params['range'][1]) for _ in range(dim)]
+        v1 = [randint(params['range'][0], params['range'][1]) for _ in range(dim)]
 
-        q_type = random.choice(['Betrag', 'Skalarprodukt'])
+        q_type = ('Betrag', 'Skalarprodukt')[self._rng.getrandbits(1)]
 
         if q_type == 'Betrag':
             v_str = f"({', '.join(map(str, v1))})"
             question = (f"Berechnen Sie den Betrag (Länge) |v| des Vektors v = {v_str}.\n"
                         f"(Runde auf {params['decimals']} Nachkommastellen)")
 
-            sum_sq = sum(n**2 for n in v1)
+            squares = [n * n for n in v1]
+            sum_sq = sum(squares)
             answer = math.sqrt(sum_sq)
 
             steps = (f"**Aufgabe:** {question}\n\n"
                      f"1. Formel (Betrag): |v| = √(v₁² + v₂² + ...)\n"
                      f"2. Einsatz: |v| = √({'² + '.join(map(str, v1))}²)\n"
-                     f"3. Quadrate: |v| = √({' + '.join(map(str, [n**2 for n in v1]))})\n"
+                     f"3. Quadrate: |v| = √({' + '.join(map(str, squares))})\n"
                      f"4. Summe: |v| = √({sum_sq}) ≈ {format_german(answer)}\n\n"
                      f"**Ergebnis (gerundet):** {format_german(round(answer, params['decimals']))}")
 
         else: # Skalarprodukt
             # Vektor 2
-            v2 = [random.randint(params['range'][0], params['range'][1]) for _ in range(dim)]
+            v2 = [randint(params['range'][0], params['range'][1]) for _ in range(dim)]
 
             v1_str = f"({', '.join(map(str, v1))})"
             v2_str = f"({', '.join(map(str, v2))})"
@@ -1152,14 +1615,15 @@ class AufgabenGenerator:
                         f"w = {v2_str}\n"
                         f"(Runde auf {params['decimals']} Nachkommastellen)")
 
-            answer = sum(v1[i] * v2[i] for i in range(dim))
+            products = [x * y for x, y in zip(v1, v2)]
+            answer = sum(products)
 
             steps = (f"**Aufgabe:** {question}\n\n"
                      f"1. Formel (Skalarprodukt): v•w = v₁w₁ + v₂w₂ + ...\n"
                      f"2. Einsatz:\n"
-                     f"   v•w = {' + '.join([f'({v1[i]}*{v2[i]})' for i in range(dim)])}\n"
+                     f"   v•w = {' + '.join([f'({x}*{y})' for x, y in zip(v1, v2)])}\n"
                      f"3. Produkte:\n"
-                     f"   v•w = {' + '.join(map(str, [v1[i]*v2[i] for i in range(dim)]))}\n"
+                     f"   v•w = {' + '.join(map(str, products))}\n"
                      f"4. Summe: v•w = {format_german(answer)}\n\n"
                      f"**Ergebnis (gerundet):** {format_german(round(answer, params['decimals']))}")
 
@@ -1172,7 +1636,7 @@ class AufgabenGenerator:
         Router-Funktion für Textaufgaben.
         Wählt eine passende Aufgabe basierend auf der Klassenstufe aus.
         """
-        year, semester = self._parse_class()
+        year = self._year
 
         # Definiere, welche Aufgaben in welchem Jahr verfügbar sind
         tasks_by_year = {
@@ -1202,38 +1666,38 @@ class AufgabenGenerator:
             return "Fehler: Keine Textaufgaben für diese Stufe.", 0, "Keine Schritte.", None
 
         # Wähle eine zufällige Funktion aus der Liste
-        task_function = random.choice(available_tasks)
+        task_function = self._rng.choice(available_tasks)
 
         # Führe die ausgewählte Funktion aus
         return task_function()
 
     def _gen_text_basic_arithmetic(self):
         """ (Klasse 1-2) Basierend auf Aufgaben 1, 2, 3"""
-        task_type = random.choice(['add', 'subtract', 'multi-step'])
+        task_type = self._rng.choice(['add', 'subtract', 'multi-step'])
 
         if task_type == 'add': # Aufgabe 1: Die Äpfel
-            item = random.choice(['Äpfel 🍎', 'Stifte ✏️', 'Bonbons 🍬', 'Bücher 📚'])
-            name = random.choice(['Lena', 'Tom', 'Mia', 'Max'])
-            num1 = random.randint(5, 15)
-            num2 = random.randint(3, 10)
-            question = f"{name} hat {num1} {item}. {random.choice(['Opa', 'Mama', 'Ein Freund'])} schenkt {name} noch {num2} {item} dazu.\nFrage: Wie viele {item} hat {name} jetzt insgesamt?"
+            item = self._rng.choice(['Äpfel 🍎', 'Stifte ✏️', 'Bonbons 🍬', 'Bücher 📚'])
+            name = self._rng.choice(['Lena', 'Tom', 'Mia', 'Max'])
+            num1 = self._rng.randint(5, 15)
+            num2 = self._rng.randint(3, 10)
+            question = f"{name} hat {num1} {item}. {self._rng.choice(['Opa', 'Mama', 'Ein Freund'])} schenkt {name} noch {num2} {item} dazu.\nFrage: Wie viele {item} hat {name} jetzt insgesamt?"
             answer = num1 + num2
             steps = f"Du musst die beiden Zahlen zusammenzählen (addieren).\nRechnung: {num1} + {num2} = {answer}\nAntwort: {name} hat jetzt {answer} {item}."
 
         elif task_type == 'subtract': # Aufgabe 2: Der Kuchen
-            item = random.choice(['Stück Kuchen 🍰', 'Kekse 🍪', 'Ballons 🎈', 'Fische 🐟'])
-            num1 = random.randint(12, 20)
-            num2 = random.randint(3, num1 - 1)
-            question = f"Es gibt {num1} {item}. {num2} {item} {random.choice(['werden gegessen', 'fliegen weg', 'werden verschenkt'])}.\nFrage: Wie viele {item} sind noch übrig?"
+            item = self._rng.choice(['Stück Kuchen 🍰', 'Kekse 🍪', 'Ballons 🎈', 'Fische 🐟'])
+            num1 = self._rng.randint(12, 20)
+            num2 = self._rng.randint(3, num1 - 1)
+            question = f"Es gibt {num1} {item}. {num2} {item} {self._rng.choice(['werden gegessen', 'fliegen weg', 'werden verschenkt'])}.\nFrage: Wie viele {item} sind noch übrig?"
             answer = num1 - num2
             steps = f"Du musst die zweite Zahl von der ersten Zahl abziehen (subtrahieren).\nRechnung: {num1} - {num2} = {answer}\nAntwort: Es sind noch {answer} {item} übrig."
 
         else: # Aufgabe 3: Die Stifte
-            item = random.choice(['Buntstifte', 'Murmeln', 'Sticker'])
-            name = random.choice(['Tim', 'Anna', 'Leo'])
-            num1 = random.randint(20, 30)
-            num2 = random.randint(2, 8)
-            num3 = random.randint(3, 7)
+            item = self._rng.choice(['Buntstifte', 'Murmeln', 'Sticker'])
+            name = self._rng.choice(['Tim', 'Anna', 'Leo'])
+            num1 = self._rng.randint(20, 30)
+            num2 = self._rng.randint(2, 8)
+            num3 = self._rng.randint(3, 7)
             question = f"{name} hat {num1} {item}. Er verliert {num2} {item}. Später findet er {num3} {item} wieder.\nFrage: Wie viele {item} hat {name} jetzt?"
             answer = num1 - num2 + num3
             steps = f"Du musst in zwei Schritten rechnen.\n1. Schritt (verlieren): {num1} - {num2} = {num1-num2}\n2. Schritt (finden): {num1-num2} + {num3} = {answer}\nAntwort: {name} hat jetzt {answer} {item}."
@@ -1242,24 +1706,24 @@ class AufgabenGenerator:
 
     def _gen_text_simple_multiplication(self):
         """ (Klasse 3) Basierend auf Aufgaben 4, 5, 6"""
-        task_type = random.choice(['divide', 'multiply', 'multi-step-money'])
+        task_type = self._rng.choice(['divide', 'multiply', 'multi-step-money'])
 
         if task_type == 'divide': # Aufgabe 4: Die Murmeln
-            item = random.choice(['Murmeln', 'Sticker', 'Kekse'])
-            total_kids = random.randint(3, 5) # Mia + 2-4 Freunde
+            item = self._rng.choice(['Murmeln', 'Sticker', 'Kekse'])
+            total_kids = self._rng.randint(3, 5) # Mia + 2-4 Freunde
             # Wähle eine Antwort (z.B. 6), multipliziere sie, um "glatte" Division zu erhalten
-            answer = random.randint(4, 8)
+            answer = self._rng.randint(4, 8)
             total_items = total_kids * answer
             question = f"{total_kids} Kinder wollen {total_items} {item} gerecht teilen.\nFrage: Wie viele {item} bekommt jedes Kind?"
             # answer = answer (bereits gesetzt)
             steps = f"Du musst die {item} durch die Anzahl der Kinder teilen (dividieren).\nRechnung: {total_items} : {total_kids} = {answer}\nAntwort: Jedes Kind bekommt {answer} {item}."
 
         elif task_type == 'multiply': # Aufgabe 5: Die Fahrräder
-            item = random.choice(['Fahrräder 🚲', 'Stühle 🪑', 'Hunde 🐕'])
+            item = self._rng.choice(['Fahrräder 🚲', 'Stühle 🪑', 'Hunde 🐕'])
             item_prop_map = {'Fahrräder 🚲': 2, 'Stühle 🪑': 4, 'Hunde 🐕': 4}
             prop_name_map = {'Fahrräder 🚲': 'Räder', 'Stühle 🪑': 'Beine', 'Hunde 🐕': 'Beine'}
 
-            num_items = random.randint(5, 9)
+            num_items = self._rng.randint(5, 9)
             prop_per_item = item_prop_map[item]
             prop_name = prop_name_map[item]
 
@@ -1268,10 +1732,10 @@ class AufgabenGenerator:
             steps = f"Du musst die Anzahl der {item} mit der Anzahl der {prop_name} pro {item} malnehmen (multiplizieren).\nRechnung: {num_items} * {prop_per_item} = {answer}\nAntwort: Sie haben zusammen {answer} {prop_name}."
 
         else: # Aufgabe 6: Die Einkäufe
-            item = random.choice(['Tüten Milch', 'Hefte', 'Schokoriegel'])
-            price = random.randint(2, 3) # 2 oder 3 Euro
-            num_items = random.randint(3, 4)
-            paid_with = random.choice([10, 20])
+            item = self._rng.choice(['Tüten Milch', 'Hefte', 'Schokoriegel'])
+            price = self._rng.randint(2, 3) # 2 oder 3 Euro
+            num_items = self._rng.randint(3, 4)
+            paid_with = self._rng.choice([10, 20])
 
             # Stelle sicher, dass bezahlt > kosten
             while (num_items * price) >= paid_with:
@@ -1287,20 +1751,20 @@ class AufgabenGenerator:
 
     def _gen_text_multi_step(self):
         """ (Klasse 4) Basierend auf Aufgaben 7, 8"""
-        task_type = random.choice(['subtract', 'multiply_months'])
+        task_type = self._rng.choice(['subtract', 'multiply_months'])
 
         if task_type == 'subtract': # Aufgabe 7: Die Lese-Challenge
-            total_pages = random.randint(150, 300)
-            day1 = random.randint(30, 50)
-            day2 = random.randint(30, 50)
+            total_pages = self._rng.randint(150, 300)
+            day1 = self._rng.randint(30, 50)
+            day2 = self._rng.randint(30, 50)
             question = f"Ein Buch hat {total_pages} Seiten. Am Montag liest Emma {day1} Seiten. Am Dienstag liest sie {day2} Seiten.\nFrage: Wie viele Seiten muss Emma noch lesen?"
             answer = total_pages - day1 - day2
             steps = f"Du musst die gelesenen Seiten von der Gesamtanzahl abziehen.\n1. Schritt (Gelesene Seiten): {day1} + {day2} = {day1 + day2}\n2. Schritt (Restliche Seiten): {total_pages} - {day1 + day2} = {answer}\nAntwort: Emma muss noch {answer} Seiten lesen."
 
         else: # Aufgabe 8: Das Taschengeld
-            name = random.choice(['Max', 'Lena', 'Tom'])
-            monthly_allowance = random.randint(15, 25)
-            months = random.randint(4, 6) # 4, 5 oder 6 Monate (halbes Jahr)
+            name = self._rng.choice(['Max', 'Lena', 'Tom'])
+            monthly_allowance = self._rng.randint(15, 25)
+            months = self._rng.randint(4, 6) # 4, 5 oder 6 Monate (halbes Jahr)
 
             if months == 6:
                 duration_str = "ein halbes Jahr"
@@ -1318,15 +1782,15 @@ class AufgabenGenerator:
         # a^2 + b^2 = c^2
 
         # Wähle ein pythagoreisches Tripel oder generiere Werte
-        a = random.randint(3, 10)
-        b = random.randint(a + 1, 15)
+        a = self._rng.randint(3, 10)
+        b = self._rng.randint(a + 1, 15)
         c = math.sqrt(a**2 + b**2)
 
         # Runde c, um die Aufgabe einfacher zu machen
-        if random.random() < 0.5: # 50% Chance auf "schöne" Zahlen
-            a, b, c = random.choice([(3, 4, 5), (6, 8, 10), (5, 12, 13), (8, 15, 17)])
+        if self._rng.random() < 0.5: # 50% Chance auf "schöne" Zahlen
+            a, b, c = self._rng.choice([(3, 4, 5), (6, 8, 10), (5, 12, 13), (8, 15, 17)])
             # Skaliere sie
-            scale = random.randint(1, 3)
+            scale = self._rng.randint(1, 3)
             a, b, c = a*scale, b*scale, c*scale
 
         # Mache c "schön" und passe b an
@@ -1338,7 +1802,7 @@ class AufgabenGenerator:
         a, b, c = round(a, 1), round(b, 1), round(c, 1)
 
         # Was wird gesucht?
-        find = random.choice(['a', 'b', 'c'])
+        find = self._rng.choice(['a', 'b', 'c'])
         drawing_info = {'shape': 'DreieckRecht', 'a': '?', 'b': '?', 'c': '?'}
 
         if find == 'a': # Höhe (Kathete)
@@ -1363,10 +1827,10 @@ class AufgabenGenerator:
 
     def _gen_text_zinsrechnung(self):
         """ (Klasse 6+) Basierend auf Aufgabe 5: Das Sparguthaben"""
-        k0 = random.randint(10, 50) * 100 # Startkapital (1000 - 5000)
-        p_percent = random.randint(2, 5) # Zinssatz (2% - 5%)
+        k0 = self._rng.randint(10, 50) * 100 # Startkapital (1000 - 5000)
+        p_percent = self._rng.randint(2, 5) # Zinssatz (2% - 5%)
         p = p_percent / 100.0
-        n = random.randint(3, 8) # Jahre
+        n = self._rng.randint(3, 8) # Jahre
 
         question = f"Herr Müller legt {k0}€ auf einem Konto an, das jährlich mit {p_percent}% Zinsen verzinst wird (Zinseszins).\nFrage: Wie hoch ist sein Guthaben nach {n} Jahren? (Runde auf 2 Dezimalstellen)"
         answer = k0 * math.pow(1 + p, n)
@@ -1384,21 +1848,21 @@ class AufgabenGenerator:
     def _gen_text_linear_eq(self):
         """ (Klasse 9+) Basierend auf Aufgabe 1: Das Familienpicknick"""
         # Preise festlegen
-        x_price = round(random.uniform(1.5, 3.5), 2) # Preis Item 1 (z.B. 2.50)
-        y_price = round(random.uniform(1.0, 2.0), 2) # Preis Item 2 (z.B. 1.20)
+        x_price = round(self._rng.uniform(1.5, 3.5), 2) # Preis Item 1 (z.B. 2.50)
+        y_price = round(self._rng.uniform(1.0, 2.0), 2) # Preis Item 2 (z.B. 1.20)
 
-        item1 = random.choice(['Äpfel', 'Birnen', 'Orangen'])
-        item2 = random.choice(['Bananen', 'Kiwis', 'Mangos'])
+        item1 = self._rng.choice(['Äpfel', 'Birnen', 'Orangen'])
+        item2 = self._rng.choice(['Bananen', 'Kiwis', 'Mangos'])
 
         # Mengen festlegen (sicherstellen, dass System lösbar ist)
-        a1 = random.randint(2, 5)
-        b1 = random.randint(2, 5)
-        a2 = random.randint(2, 5)
-        b2 = random.randint(2, 5)
+        a1 = self._rng.randint(2, 5)
+        b1 = self._rng.randint(2, 5)
+        a2 = self._rng.randint(2, 5)
+        b2 = self._rng.randint(2, 5)
 
         # Sicherstellen, dass die Gleichungen nicht linear abhängig sind
         while (a1 / (a2 + 0.01)) == (b1 / (b2 + 0.01)): # Kleiner Epsilon-Check
-            a2 = random.randint(2, 5)
+            a2 = self._rng.randint(2, 5)
 
         # Gesamtkosten berechnen
         c1 = a1 * x_price + b1 * y_price
@@ -1422,11 +1886,11 @@ class AufgabenGenerator:
 
     def _gen_text_bernoulli(self):
         """ (Klasse 9+) Basierend auf Aufgabe 3: Der Würfelwurf"""
-        n = random.randint(4, 6) # Anzahl Versuche
-        k = random.randint(2, n-1) # Anzahl Erfolge
+        n = self._rng.randint(4, 6) # Anzahl Versuche
+        k = self._rng.randint(2, n-1) # Anzahl Erfolge
 
         # p (Wahrscheinlichkeit)
-        p_choice = random.choice(['Wuerfel', 'Muenze'])
+        p_choice = self._rng.choice(['Wuerfel', 'Muenze'])
 
         if p_choice == 'Wuerfel':
             p_nenner = 6
@@ -1472,7 +1936,7 @@ class AufgabenGenerator:
 
     def _gen_text_optimization(self):
         """ (Klasse 10+) Basierend auf Aufgabe 2: Der maximale Ertrag"""
-        zaun_laenge = random.randint(8, 20) * 10 # 80 - 200 Meter
+        zaun_laenge = self._rng.randint(8, 20) * 10 # 80 - 200 Meter
 
         # A = x*y
         # L = x + 2y (da eine Seite an der Mauer)
@@ -1487,7 +1951,7 @@ class AufgabenGenerator:
         a_max = x_max * y_max
 
         # Was wird gefragt?
-        q_type = random.choice(['x', 'y', 'A'])
+        q_type = self._rng.choice(['x', 'y', 'A'])
 
         if q_type == 'x':
             question = f"Ein Landwirt hat {zaun_laenge}m Zaun, um ein rechteckiges Gehege entlang einer Mauer zu bauen (3 Seiten).\nFrage: Wie lang muss die Seite (x) parallel zur Mauer sein, um die Fläche zu maximieren?"
@@ -1528,8 +1992,10 @@ class AufgabenSession:
         self.time_limit = self._get_time_limit(difficulty)
 
         self.generator = AufgabenGenerator(topic, difficulty, class_name, self.num_questions)
+        self._last_index = self.num_questions - 1 # Index der letzten Frage
         self.current_question_index = 0
-        self.start_time = time.time()
+        self._feedback_pending = False # True, solange der Feedback-Dialog aussteht
+        self.start_time = time.monotonic()
         self.time_left = self.time_limit
         self.timer_id = None
 
@@ -1546,7 +2012,7 @@ class AufgabenSession:
     def _create_session_window(self):
         self.window = tk.Toplevel(self.parent_app.root)
         self.window.title(f"Übung: {self.topic} ({self.difficulty}) | {self.class_name}")
-        self.window.attributes('-fullscreen', True)
+        self.window.withdraw() # Erst komplett aufbauen, dann anzeigen
         self.window.protocol("WM_DELETE_WINDOW", self._cancel_session)
 
         self.frame = tk.Frame(self.window, bg="#f5f5f5")
@@ -1555,11 +2021,16 @@ class AufgabenSession:
         tk.Label(self.frame, text=f"Aufgaben: {self.topic} ({self.difficulty}) | {self.class_name}",
                  font=("Arial", 32, "bold"), bg="#f5f5f5").pack(pady=(10, 20))
 
-        self.timer_label = tk.Label(self.frame, text=f"Verbleibende Zeit: {self.time_left}s",
+        # Veränderliche Texte über StringVars
+        self.timer_var = tk.StringVar(self.window, value=f"Verbleibende Zeit: {self.time_left}s")
+        self.question_var = tk.StringVar(self.window)
+        self.next_button_var = tk.StringVar(self.window, value="Antwort prüfen & Weiter >>")
+
+        self.timer_label = tk.Label(self.frame, textvariable=self.timer_var,
                                     font=("Courier", 18), fg="red", bg="#f5f5f5")
         self.timer_label.pack(pady=10)
 
-        self.question_label = tk.Label(self.frame, text="", font=("Arial", 20),
+        self.question_label = tk.Label(self.frame, textvariable=self.question_var, font=("Arial", 20),
                                        wraplength=800, justify=tk.CENTER, bg="#f5f5f5")
         self.question_label.pack(pady=30)
 
@@ -1568,7 +2039,7 @@ class AufgabenSession:
         self.answer_entry.bind('<Return>', self._check_answer)
         ToolTip(self.answer_entry, "Eingabe der Antwort. Bestätigung mit **Enter**.")
 
-        self.next_button = ttk.Button(self.frame, text="Antwort prüfen & Weiter >>",
+        self.next_button = ttk.Button(self.frame, textvariable=self.next_button_var,
                                       command=self._check_answer, style='Big.TButton')
         self.next_button.pack(pady=20)
         ToolTip(self.next_button, "Prüft die Antwort und geht zur nächsten Frage.")
@@ -1578,52 +2049,74 @@ class AufgabenSession:
         self.cancel_button.pack(pady=40)
         ToolTip(self.cancel_button, "Bricht die aktuelle Übung ab. Der Fortschritt geht verloren.")
 
+        # Fertig aufgebaut: layouten, auf Vollbild schalten und anzeigen
+        self.window.update_idletasks()
+        self.window.attributes('-fullscreen', True)
+        self.window.deiconify()
+
         self.window.focus_set()
         self._update_question()
         self._start_timer()
 
     def _cancel_session(self, event=None):
-        if messagebox.askyesno("Abbrechen bestätigen",
-                               "Möchten Sie die Übung wirklich abbrechen? Der aktuelle Fortschritt geht dabei verloren.",
-                               parent=self.window):
-            if self.timer_id:
-                self.window.after_cancel(self.timer_id)
-            self.window.destroy()
-            self.parent_app.show_main_menu()
-            print("Übung abgebrochen. Zurück zum Hauptmenü.")
+        # Noch nichts beantwortet -> kein Fortschritt, der verloren gehen könnte: ohne Rückfrage schließen
+        nothing_answered = self.current_question_index == 0 and not self._feedback_pending
+        if nothing_answered or messagebox.askyesno("Abbrechen bestätigen",
+                                                   "Möchten Sie die Übung wirklich abbrechen? Der aktuelle Fortschritt geht dabei verloren.",
+                                                   parent=self.window):
+            self._do_cancel()
+
+    def _do_cancel(self):
+        if self.timer_id:
+            self.window.after_cancel(self.timer_id)
+        self.window.destroy()
+        self.parent_app.show_main_menu()
+        print("Übung abgebrochen. Zurück zum Hauptmenü.")
 
     def _start_timer(self):
         self.time_left = self.time_limit
+        self._last_text = None # Zuletzt im Label angezeigter Text
+        # Alle Anzeigetexte vorberechnen; der Tick liest nur per Index
+        self._time_strings = [f"Verbleibende Zeit: {t // 60:02d}:{t % 60:02d}"
+                              for t in range(self.time_limit + 1)]
+        # Absolute Deadline statt Herunterzählen -> kein Aufsummieren von after()-Verspätungen
+        self.deadline = time.monotonic() + self.time_limit
         self._update_timer_label()
-        self._countdown()
+        self.timer_id = self.window.after(1000, self._countdown)
 
     def _update_timer_label(self):
-        minutes = self.time_left // 60
-        seconds = self.time_left % 60
-        self.timer_label.config(text=f"Verbleibende Zeit: {minutes:02d}:{seconds:02d}")
+        text = self._time_strings[self.time_left]
+        if text != self._last_text: # Tk nur bei geändertem Text ansprechen
+            self.timer_var.set(text)
+            self._last_text = text
 
     def _countdown(self):
-        if self.time_left > 0:
-            self.time_left -= 1
-            self._update_timer_label()
-            self.timer_id = self.window.after(1000, self._countdown)
-        else:
+        remaining = max(0.0, self.deadline - time.monotonic())
+        shown = math.ceil(remaining)
+        if shown <= 0:
+            self.time_left = 0
             self._finish_session(timeout=True)
+            return
+        if shown != self.time_left: # Label nur anfassen, wenn sich die Sekunde geändert hat
+            self.time_left = shown
+            self._update_timer_label()
+        # Nächster Tick genau zum nächsten Sekundenwechsel
+        self.timer_id = self.window.after(int((remaining - (shown - 1)) * 1000) + 1, self._countdown)
 
     def _update_question(self):
         q_data = self.generator.questions[self.current_question_index]
-        self.question_label.config(text=f"Frage {q_data['id']}/{self.num_questions}:\n{q_data['question']}")
+        self.question_var.set(f"Frage {q_data.id}/{self.num_questions}:\n{q_data.question}")
         self.answer_entry.delete(0, tk.END)
 
-        if self.current_question_index == self.num_questions - 1:
-            self.next_button.config(text="Antwort prüfen & Beenden (Letzte Frage)")
-        else:
-            self.next_button.config(text="Antwort prüfen & Weiter >>")
+        if self.current_question_index == self._last_index: # Button-Text nur beim Übergang zur letzten Frage ändern
+            self.next_button_var.set("Antwort prüfen & Beenden (Letzte Frage)")
 
         self.answer_entry.focus_set()
 
     def _check_answer(self, event=None):
-        if self.current_question_index >= self.num_questions:
+        if self._feedback_pending:
+            return # Antwort wurde schon geprüft, Feedback erscheint gleich
+        if self.current_question_index > self._last_index:
             self._finish_session()
             return
 
@@ -1633,48 +2126,41 @@ class AufgabenSession:
 
         q_data = self.generator.questions[self.current_question_index]
 
-        try:
-            user_answer = float(cleaned_input)
-            q_data['user_answer'] = user_answer
-        except ValueError:
-            if cleaned_input == "":
-                user_answer = None
-                q_data['user_answer'] = None
-            else:
-                user_answer = "Ungültige Eingabe"
-                q_data['user_answer'] = user_answer
-
-        correct_answer = q_data['correct_answer']
-        solution_steps = q_data.get('solution_steps', "Kein detaillierter Lösungsweg verfügbar.")
-        is_correct = False
+        user_answer = _parse_answer(cleaned_input)
+        q_data.user_answer = user_answer
 
-        if isinstance(user_answer, (int, float)) and abs(user_answer - correct_answer) < 0.1:
-            is_correct = True
+        correct_answer = q_data.correct_answer
+        is_correct = _is_correct_answer(user_answer, correct_answer)
+        q_data.is_correct = is_correct
 
-        drawing_info = q_data.get('drawing_info')
+        drawing_info = q_data.drawing_info
 
         if is_correct:
-            FeedbackDialog(self.window,
-                           "Antwortprüfung",
-                           is_correct=True,
-                           message="Sehr gut gemacht!")
+            feedback = {'is_correct': True, 'message': "Sehr gut gemacht!"}
         else:
             correct_answer_formatted = format_german(correct_answer)
+            solution_steps = format_steps(q_data.solution_steps) # Erst hier formatieren (nur bei Fehlern nötig)
             feedback_msg = (
                 f"Deine Eingabe: {user_input if user_input else 'Keine Angabe'}\n"
                 f"Das korrekte Ergebnis lautet: {correct_answer_formatted}\n\n"
                 f"--- **Lösungsweg** ---\n{solution_steps}"
             )
+            feedback = {'is_correct': False, 'message': feedback_msg, 'drawing_info': drawing_info}
 
-            FeedbackDialog(self.window,
-                           "Antwortprüfung",
-                           is_correct=False,
-                           message=feedback_msg,
-                           drawing_info=drawing_info)
+        # Dialog erst im Leerlauf aufbauen; weiter geht es nach dem Schließen in _advance()
+        self._feedback_pending = True
+        self.window.after_idle(self._show_feedback, feedback)
 
+    def _show_feedback(self, feedback):
+        if self.window.winfo_exists(): # Sitzung könnte inzwischen (Zeitablauf) beendet sein
+            show_feedback(self.window, "Antwortprüfung", on_close=self._advance, **feedback)
+
+    def _advance(self):
+        """Nach dem Schließen des Feedback-Dialogs: nächste Frage laden oder auswerten."""
+        self._feedback_pending = False
         self.current_question_index += 1
 
-        if self.current_question_index == self.num_questions:
+        if self.current_question_index > self._last_index:
             self._finish_session()
         else:
             self._update_question()
@@ -1683,31 +2169,27 @@ class AufgabenSession:
         if self.timer_id:
             self.window.after_cancel(self.timer_id)
 
-        elapsed_time = (time.time() - self.start_time)
         if timeout:
             elapsed_time = self.time_limit
         else:
             elapsed_time = self.time_limit - self.time_left
 
-        correct_count = 0
         total_count = self.num_questions
-
-        for q in self.generator.questions:
-            if isinstance(q['user_answer'], (int, float)) and abs(q['user_answer'] - q['correct_answer']) < 0.1:
-                correct_count += 1
+        # Ergebnis wurde bereits in _check_answer je Frage festgehalten
+        correct_count = sum(1 for q in self.generator.questions if q.is_correct)
 
         full_topic = f"{self.topic} ({self.difficulty})"
 
-        self.parent_app.db.save_result(full_topic, self.class_name, correct_count, total_count, elapsed_time)
+        self.parent_app.db.save_result_async(full_topic, self.class_name, correct_count, total_count, elapsed_time)
 
-        result_msg = "⏱️Übungszeit abgelaufen!" if timeout else "✅Übung beendet!"
-        result_msg += (f"\n\nKlasse: {self.class_name}\n"
-                       f"Thema: {full_topic}\n"
-                       f"Richtige Antworten: {correct_count} von {total_count}\n"
-                       f"Genutzte Zeit: {elapsed_time:.1f}s / {self.time_limit}s\n"
-                       f"Ergebnis in Datenbank gespeichert.")
+        header = "⏱️Übungszeit abgelaufen!" if timeout else "✅Übung beendet!"
+        result_msg = (f"{header}\n\nKlasse: {self.class_name}\n"
+                      f"Thema: {full_topic}\n"
+                      f"Richtige Antworten: {correct_count} von {total_count}\n"
+                      f"Genutzte Zeit: {elapsed_time:.1f}s / {self.time_limit}s\n"
+                      f"Ergebnis in Datenbank gespeichert.")
 
-        messagebox.showinfo("Übungsergebnis", result_msg)
+        self.parent_app.show_result_dialog("Übungsergebnis", result_msg, parent=self.window)
         self.window.destroy()
         self.parent_app.show_main_menu()
 
@@ -1719,15 +2201,18 @@ class HalbjahrestestSession:
     def __init__(self, parent_app, class_name):
         self.parent_app = parent_app
         self.class_name = class_name
+        self._rng = random.Random() # Eigene Zufallsquelle wie im AufgabenGenerator
 
         self.all_questions = []
         self._generate_test_questions() # Füllt self.all_questions
 
         self.num_questions = len(self.all_questions) # Sollte 23 sein
+        self._last_index = self.num_questions - 1 # Index der letzten Frage
         self.time_limit = self._get_time_limit() # 30 Minuten
 
         self.current_question_index = 0
-        self.start_time = time.time()
+        self._feedback_pending = False # True, solange der Feedback-Dialog aussteht
+        self.start_time = time.monotonic()
         self.time_left = self.time_limit
         self.timer_id = None
 
@@ -1743,40 +2228,26 @@ class HalbjahrestestSession:
         # 1. Verfügbare Themen für die Klasse ermitteln
         _, _, current_total_semester = self.parent_app._parse_selected_class()
 
-        # --- MODIFIZIERT: Alle Themen auflisten (inkl. Textaufgaben) ---
-        all_topics = [
-            "Zahlenraum-Training", "Terme & Gleichungen", "Geometrie", "Statistik",
-            "Stochastik", "Polynomdivision", "Vektor-Berechnung", "Textaufgaben"
-        ]
-
-        available_topics = [
-            t for t in all_topics
-            if current_total_semester >= self.parent_app._get_min_class(t)
-        ]
-
-        if not available_topics:
-            available_topics = ["Zahlenraum-Training"]
+        # --- MODIFIZIERT: Alle Themen (inkl. Textaufgaben), gefiltert und gecacht ---
+        available_topics = _available_topics_for(current_total_semester)
 
         self.all_questions = []
 
-        # 2. Genaue Anzahl pro Schwierigkeitsgrad definieren
-        specs = [("Leicht", 15), ("Mittel", 5), ("Schwer", 3)]
-
-        for difficulty, count in specs:
-            for _ in range(count):
-                topic = random.choice(available_topics)
-
-                gen = AufgabenGenerator(topic, difficulty, self.class_name, num_questions=1)
+        # 2. Themen vorab ziehen (Anzahl je Schwierigkeitsgrad: _HALBJAHR_SPECS) und
+        #    je (Thema, Schwierigkeit) bündeln -> ein Generator pro Gruppe
+        topics = self._rng.choices(available_topics, k=len(_HALBJAHR_DIFFICULTIES))
+        buckets = Counter(zip(topics, _HALBJAHR_DIFFICULTIES))
 
-                if gen.questions:
-                    self.all_questions.append(gen.questions[0])
+        for (topic, difficulty), n in buckets.items():
+            gen = AufgabenGenerator(topic, difficulty, self.class_name, num_questions=n)
+            self.all_questions.extend(gen.questions)
 
         # 3. Alle 23 Fragen mischen
-        random.shuffle(self.all_questions)
+        self._rng.shuffle(self.all_questions)
 
         # 4. IDs neu nummerieren
         for i, q in enumerate(self.all_questions):
-            q['id'] = i + 1
+            q.id = i + 1
 
         self.num_questions = len(self.all_questions)
         print(f"Halbjahrestest generiert: {self.num_questions} Fragen (aus {available_topics}) für {self.class_name}.")
@@ -1785,7 +2256,7 @@ class HalbjahrestestSession:
     def _create_session_window(self):
         self.window = tk.Toplevel(self.parent_app.root)
         self.window.title(f"Halbjahrestest! | {self.class_name}")
-        self.window.attributes('-fullscreen', True)
+        self.window.withdraw() # Erst komplett aufbauen, dann anzeigen
         self.window.protocol("WM_DELETE_WINDOW", self._cancel_session)
 
         self.frame = tk.Frame(self.window, bg="#f5f5f5")
@@ -1794,11 +2265,16 @@ class HalbjahrestestSession:
         tk.Label(self.frame, text=f"Halbjahrestest! | {self.class_name}",
                  font=("Arial", 32, "bold"), bg="#f5f5f5").pack(pady=(10, 20))
 
-        self.timer_label = tk.Label(self.frame, text=f"Verbleibende Zeit: {self.time_left}s",
+        # Veränderliche Texte über StringVars
+        self.timer_var = tk.StringVar(self.window, value=f"Verbleibende Zeit: {self.time_left}s")
+        self.question_var = tk.StringVar(self.window)
+        self.next_button_var = tk.StringVar(self.window, value="Antwort prüfen & Weiter >>")
+
+        self.timer_label = tk.Label(self.frame, textvariable=self.timer_var,
                                     font=("Courier", 18), fg="red", bg="#f5f5f5")
         self.timer_label.pack(pady=10)
 
-        self.question_label = tk.Label(self.frame, text="", font=("Arial", 20),
+        self.question_label = tk.Label(self.frame, textvariable=self.question_var, font=("Arial", 20),
                                        wraplength=800, justify=tk.CENTER, bg="#f5f5f5")
         self.question_label.pack(pady=30)
 
@@ -1807,7 +2283,7 @@ class HalbjahrestestSession:
         self.answer_entry.bind('<Return>', self._check_answer)
         ToolTip(self.answer_entry, "Eingabe der Antwort. Bestätigung mit **Enter**.")
 
-        self.next_button = ttk.Button(self.frame, text="Antwort prüfen & Weiter >>",
+        self.next_button = ttk.Button(self.frame, textvariable=self.next_button_var,
                                       command=self._check_answer, style='Big.TButton')
         self.next_button.pack(pady=20)
         ToolTip(self.next_button, "Prüft die Antwort und geht zur nächsten Frage.")
@@ -1817,6 +2293,11 @@ class HalbjahrestestSession:
         self.cancel_button.pack(pady=40)
         ToolTip(self.cancel_button, "Bricht den Test ab. Der Fortschritt geht verloren.")
 
+        # Fertig aufgebaut: layouten, auf Vollbild schalten und anzeigen
+        self.window.update_idletasks()
+        self.window.attributes('-fullscreen', True)
+        self.window.deiconify()
+
         # UI initialisieren
         if self.all_questions:
             self._update_question()
@@ -1827,44 +2308,56 @@ class HalbjahrestestSession:
 
 
     def _cancel_session(self, event=None, force_cancel=False):
-        if force_cancel or messagebox.askyesno("Abbrechen bestätigen",
-                                               "Möchten Sie den Test wirklich abbrechen? Der aktuelle Fortschritt geht dabei verloren.",
-                                               parent=self.window):
-
-            if self.timer_id:
-                self.window.after_cancel(self.timer_id)
-            self.window.destroy()
-            self.parent_app.show_main_menu()
-            print("Test abgebrochen. Zurück zum Hauptmenü.")
+        # Noch nichts beantwortet -> kein Fortschritt, der verloren gehen könnte: ohne Rückfrage schließen
+        nothing_answered = self.current_question_index == 0 and not self._feedback_pending
+        if force_cancel or nothing_answered or messagebox.askyesno("Abbrechen bestätigen",
+                                                                   "Möchten Sie den Test wirklich abbrechen? Der aktuelle Fortschritt geht dabei verloren.",
+                                                                   parent=self.window):
+            self._do_cancel()
+
+    def _do_cancel(self):
+        if self.timer_id:
+            self.window.after_cancel(self.timer_id)
+        self.window.destroy()
+        self.parent_app.show_main_menu()
+        print("Test abgebrochen. Zurück zum Hauptmenü.")
 
     def _start_timer(self):
         self.time_left = self.time_limit
+        self._last_text = None # Zuletzt im Label angezeigter Text
+        # Absolute Deadline statt Herunterzählen -> kein Drift über 30 Minuten
+        self.deadline = time.monotonic() + self.time_limit
         self._update_timer_label()
-        self._countdown()
+        self.timer_id = self.window.after(1000, self._countdown)
 
     def _update_timer_label(self):
-        minutes = self.time_left // 60
-        seconds = self.time_left % 60
-        self.timer_label.config(text=f"Verbleibende Zeit: {minutes:02d}:{seconds:02d}")
+        time_left = self.time_left
+        text = f"Verbleibende Zeit: {time_left // 60:02d}:{time_left % 60:02d}"
+        if text != self._last_text: # Tk nur bei geändertem Text ansprechen
+            self.timer_var.set(text)
+            self._last_text = text
 
     def _countdown(self):
-        if self.time_left > 0:
-            self.time_left -= 1
-            self._update_timer_label()
-            self.timer_id = self.window.after(1000, self._countdown)
-        else:
+        remaining = max(0.0, self.deadline - time.monotonic())
+        shown = math.ceil(remaining)
+        if shown <= 0:
+            self.time_left = 0
             self._finish_session(timeout=True)
+            return
+        if shown != self.time_left: # Label nur anfassen, wenn sich die Sekunde geändert hat
+            self.time_left = shown
+            self._update_timer_label()
+        # Nächster Tick genau zum nächsten Sekundenwechsel
+        self.timer_id = self.window.after(int((remaining - (shown - 1)) * 1000) + 1, self._countdown)
 
     def _update_question(self):
-        if self.current_question_index < self.num_questions:
+        if self.current_question_index <= self._last_index:
             q_data = self.all_questions[self.current_question_index]
-            self.question_label.config(text=f"Frage {q_data['id']}/{self.num_questions}:\n{q_data['question']}")
+            self.question_var.set(f"Frage {q_data.id}/{self.num_questions}:\n{q_data.question}")
             self.answer_entry.delete(0, tk.END)
 
-            if self.current_question_index == self.num_questions - 1:
-                self.next_button.config(text="Antwort prüfen & Beenden (Letzte Frage)")
-            else:
-                self.next_button.config(text="Antwort prüfen & Weiter >>")
+            if self.current_question_index == self._last_index: # Button-Text nur beim Übergang zur letzten Frage ändern
+                self.next_button_var.set("Antwort prüfen & Beenden (Letzte Frage)")
 
             self.answer_entry.focus_set()
         else:
@@ -1873,8 +2366,10 @@ class HalbjahrestestSession:
 
 
     def _check_answer(self, event=None):
+        if self._feedback_pending:
+            return # Antwort wurde schon geprüft, Feedback erscheint gleich
         # Guard-Clause: Verhindert Ausführung, wenn Test bereits beendet
-        if self.current_question_index >= self.num_questions:
+        if self.current_question_index > self._last_index:
             # Ruft die Auswertung erneut auf, falls der Benutzer schnell doppelt klickt
             self._finish_session()
             return
@@ -1884,54 +2379,44 @@ class HalbjahrestestSession:
 
         q_data = self.all_questions[self.current_question_index]
 
-        try:
-            user_answer = float(cleaned_input)
-            q_data['user_answer'] = user_answer
-        except ValueError:
-            if cleaned_input == "":
-                user_answer = None
-                q_data['user_answer'] = None
-            else:
-                user_answer = "Ungültige Eingabe"
-                q_data['user_answer'] = user_answer
-
-        correct_answer = q_data['correct_answer']
-        solution_steps = q_data.get('solution_steps', "Kein detaillierter Lösungsweg verfügbar.")
-        is_correct = False
+        user_answer = _parse_answer(cleaned_input)
+        q_data.user_answer = user_answer
 
-        if isinstance(user_answer, (int, float)) and abs(user_answer - correct_answer) < 0.1:
-            is_correct = True
+        correct_answer = q_data.correct_answer
+        is_correct = _is_correct_answer(user_answer, correct_answer)
+        q_data.is_correct = is_correct # Für die Auswertung merken
 
-        drawing_info = q_data.get('drawing_info')
+        drawing_info = q_data.drawing_info
 
-        # Das Feedback-Fenster blockiert die Ausführung, bis es geschlossen wird
         if is_correct:
-            FeedbackDialog(self.window,
-                           "Antwortprüfung",
-                           is_correct=True,
-                           message="Sehr gut gemacht!")
+            feedback = {'is_correct': True, 'message': "Sehr gut gemacht!"}
         else:
             correct_answer_formatted = format_german(correct_answer)
+            solution_steps = format_steps(q_data.solution_steps) # Erst hier formatieren (nur bei Fehlern nötig)
             feedback_msg = (
                 f"Deine Eingabe: {user_input if user_input else 'Keine Angabe'}\n"
                 f"Das korrekte Ergebnis lautet: {correct_answer_formatted}\n\n"
                 f"--- **Lösungsweg** ---\n{solution_steps}"
             )
+            feedback = {'is_correct': False, 'message': feedback_msg, 'drawing_info': drawing_info}
 
-            FeedbackDialog(self.window,
-                           "Antwortprüfung",
-                           is_correct=False,
-                           message=feedback_msg,
-                           drawing_info=drawing_info)
+        # Dialog erst im Leerlauf aufbauen; weiter geht es nach dem Schließen in _advance()
+        self._feedback_pending = True
+        self.window.after_idle(self._show_feedback, feedback)
 
-        # Der Code wird erst HIER fortgesetzt, nachdem "OK" im FeedbackDialog geklickt wurde
+    def _show_feedback(self, feedback):
+        if self.window.winfo_exists(): # Sitzung könnte inzwischen (Zeitablauf) beendet sein
+            show_feedback(self.window, "Antwortprüfung", on_close=self._advance, **feedback)
 
+    def _advance(self):
+        """Nach dem Schließen des Feedback-Dialogs: nächste Frage laden oder auswerten."""
+        self._feedback_pending = False
         self.current_question_index += 1
 
         # --- KORREKTUR/VERIFIZIERUNG ---
         # Dieser Block stellt sicher, dass die Auswertung (finish) oder
         # die nächste Frage (update) korrekt aufgerufen wird.
-        if self.current_question_index == self.num_questions:
+        if self.current_question_index > self._last_index:
             # Dies ist jetzt die letzte Frage, also Test beenden
             self._finish_session()
         else:
@@ -1947,21 +2432,17 @@ class HalbjahrestestSession:
             self.window.after_cancel(self.timer_id)
             self.timer_id = None # Verhindern, dass es mehrmals aufgerufen wird
 
-        elapsed_time = (time.time() - self.start_time)
         if timeout:
             elapsed_time = self.time_limit
         else:
             elapsed_time = self.time_limit - self.time_left
 
-        correct_count = 0
         total_count = self.num_questions
-
-        for q in self.all_questions:
-            if isinstance(q['user_answer'], (int, float)) and abs(q['user_answer'] - q['correct_answer']) < 0.1:
-                correct_count += 1
+        # Ergebnis wurde bereits in _check_answer je Frage festgehalten
+        correct_count = sum(1 for q in self.all_questions if q.is_correct)
 
         full_topic = "Halbjahrestest"
-        self.parent_app.db.save_result(full_topic, self.class_name, correct_count, total_count, elapsed_time)
+        self.parent_app.db.save_result_async(full_topic, self.class_name, correct_count, total_count, elapsed_time)
 
         passing_threshold = 0.90
         score = 0
@@ -1969,21 +2450,19 @@ class HalbjahrestestSession:
             score = correct_count / total_count
 
         is_passed = score >= passing_threshold
+        passing_percent = passing_threshold * 100
 
-        result_msg = "⏱️Testzeit abgelaufen!" if timeout else "✅Test beendet!"
-        result_msg += (f"\n\nKlasse: {self.class_name}\n"
-                       f"Thema: {full_topic}\n"
-                       f"Richtige Antworten: {correct_count} von {total_count}\n"
-                       f"Erreichte Punktzahl: {score*100:.1f}%\n"
-                       f"Benötigt zum Bestehen: {passing_threshold*100}%\n\n"
-                       f"Ergebnis in Datenbank gespeichert.")
+        header = "⏱️Testzeit abgelaufen!" if timeout else "✅Test beendet!"
+        verdict = ("HERZLICHEN GLÜCKWUNSCH! Test bestanden!" if is_passed
+                   else "Leider nicht bestanden. Versuche es erneut!")
+        result_msg = (f"{header}\n\nKlasse: {self.class_name}\n"
+                      f"Thema: {full_topic}\n"
+                      f"Richtige Antworten: {correct_count} von {total_count}\n"
+                      f"Erreichte Punktzahl: {score*100:.1f}%\n"
+                      f"Benötigt zum Bestehen: {passing_percent}%\n\n"
+                      f"Ergebnis in Datenbank gespeichert.\n\n{verdict}")
 
-        if is_passed:
-            result_msg += "\n\nHERZLICHEN GLÜCKWUNSCH! Test bestanden!"
-        else:
-            result_msg += "\n\nLeider nicht bestanden. Versuche es erneut!"
-
-        messagebox.showinfo("Testergebnis", result_msg, parent=self.window)
+        self.parent_app.show_result_dialog("Testergebnis", result_msg, parent=self.window)
 
         if is_passed:
             self._show_certificate()
@@ -1996,82 +2475,146 @@ class HalbjahrestestSession:
 # --- HAUPTANWENDUNG ---------------------------------------------------------------
 # =================================================================================
 class MatheGenieApp:
+    SPLASH_MIN_MS = 800 # Mindestanzeigedauer des Splash-Screens (wahrnehmbar, aber ohne Leerlauf)
+
     def __init__(self, root):
         self.root = root
         self.root.title("Mathegenie by Rainer Liegard")
 
-        self.db = DatabaseManager()
+        self._splash_start = time.monotonic() # Startzeitpunkt für die Splash-Mindestdauer
+        # Datenbank (PRAGMAs, evtl. Migration) im Hintergrund öffnen, während der Splash angezeigt wird
+        self._db = None
+        self._db_error = None
+        self._db_ready = threading.Event()
+        threading.Thread(target=self._open_db, daemon=True).start()
+        self._init_styles()
+        # Endgültige Größe setzen, bevor der erste Frame gepackt wird
+        self.root.geometry(f"{self.root.winfo_screenwidth()}x{self.root.winfo_screenheight()}+0+0")
         self.root.attributes('-fullscreen', True)
+        self.root.update_idletasks()
+        # Fenstergröße merken (für die Toast-Position); aktualisiert nur bei <Configure> des Hauptfensters
+        self._root_size = (self.root.winfo_width(), self.root.winfo_height())
+        self.root.bind("<Configure>", self._cache_root_size)
 
         self.current_frame = None
-        self.schuljahr_options = [f"Klasse {j}.{h}" for j in range(1, 14) for h in range(1, 3)]
+        self.schuljahr_options = _SCHULJAHR_OPTIONS
+        # Klassenname -> (Jahr, Halbjahr, Gesamtsemester)
+        self._class_lookup = {f"Klasse {j}.{h}": (j, h, (j - 1) * 2 + h)
+                              for j in range(1, 14) for h in range(1, 3)}
 
         self.selected_schuljahr = tk.StringVar(self.root)
         self.selected_schuljahr.set(self.schuljahr_options[0]) # "Klasse 1.1"
         self.schuljahr_dropdown = None
+        self._result_dialog = None # Wiederverwendeter Ergebnis-Dialog (wird beim ersten Bedarf gebaut)
+        self._toast = None # Wiederverwendetes Toast-Fenster
+        self._toast_after = None # after-ID für das Ausblenden des Toasts
+        self._toast_sizes = {} # Nachricht -> (Breite, Höhe) des Toasts
+        # Statische Ansichten werden nur einmal gebaut und danach nur ein-/ausgeblendet
+        self._formula_frame = None
+        self._main_menu_frame = None
+        self._progress_frame = None
+        self._tree_changes = None # DB-Änderungszähler beim letzten Füllen der Tabelle
 
         self.show_splash_screen()
 
+    def _open_db(self):
+        try:
+            self._db = DatabaseManager(on_write_error=self._report_db_write_error)
+        except Exception as e:
+            self._db_error = e
+        finally:
+            self._db_ready.set()
+
+    def _report_db_write_error(self, error):
+        """Meldet einen fehlgeschlagenen Speichervorgang; wird im Schreib-Thread aufgerufen."""
+        self.root.after(0, lambda: messagebox.showerror(
+            "Speicherfehler", f"Das Ergebnis konnte nicht gespeichert werden:\n{error}"))
+
+    @property
+    def db(self):
+        """Die Datenbank; wartet beim ersten Zugriff, bis das Öffnen im Hintergrund fertig ist."""
+        self._db_ready.wait()
+        if self._db_error is not None:
+            raise self._db_error
+        return self._db
+
+    def _init_styles(self):
+        """Konfiguriert alle ttk-Button-Stile."""
+        self.style = style = ttk.Style() # Prozessweit; wird für spätere Anpassungen aufbewahrt
+        style.configure('TButton', font=('Arial', 16), padding=10)
+        style.configure('Big.TButton', font=('Arial', 24, 'bold'), padding=20)
+        style.configure('Dialog.TButton', font=('Arial', 12))
+        for level, color in (('Leicht', "#D4EDDA"), ('Mittel', "#FFF3CD"), ('Schwer', "#F8D7DA")):
+            style.configure(f'{level}.TButton', font=('Arial', 20, 'bold'), padding=20, background=color)
+
     def _parse_selected_class(self):
-        """Extrahiert Jahr und Halbjahr aus self.selected_schuljahr und berechnet das Gesamtsemester."""
-        class_name = self.selected_schuljahr.get()
-        parts = class_name.split()
-        if len(parts) > 1:
-            grade_parts = parts[1].split('.')
-            if len(grade_parts) == 2:
-                try:
-                    year = int(grade_parts[0])
-                    semester = int(grade_parts[1])
-                    total_semester = (year - 1) * 2 + semester
-                    return year, semester, total_semester
-                except ValueError:
-                    pass
-        return 1, 1, 1 # Standard
+        """Liefert Jahr, Halbjahr und Gesamtsemester der gewählten Klasse (Tabellen-Lookup)."""
+        return self._class_lookup.get(self.selected_schuljahr.get(), (1, 1, 1)) # Standard
 
     # --- MODIFIZIERT: Neue Klassenstufen ---
     def _get_min_class(self, topic):
         """Definiert das Mindest-Semester (Gesamtsemester-Index) für ein Thema."""
-        mapping = {
-            "Zahlenraum-Training": 1,   # Kl 1.1
-            "Textaufgaben": 1,          # Kl 1.1 (startet mit Grundschul-Aufgaben)
-            "Terme & Gleichungen": 9,   # Kl 5.1
-            "Geometrie": 9,             # Kl 5.1 (3D-Inhalte werden intern nach Jahr gesteuert)
-            "Statistik": 13,            # Kl 7.1
-            "Stochastik": 15,           # Kl 8.1
-            "Polynomdivision": 19,      # Kl 10.1
-            "Vektor-Berechnung": 19     # Kl 10.1
-        }
-        return mapping.get(topic, 1)
-
-    def _show_toast_message(self, message):
-        """Simuliert eine kurze, nicht-blockierende 'Toast'-Nachricht."""
-        toast = tk.Toplevel(self.root)
-        toast.wm_overrideredirect(True)
+        return _MIN_CLASS.get(topic, 1)
 
-        label = tk.Label(toast, text=message,
-                         bg="#2c3e50", fg="white",
-                         font=("Arial", 14, "bold"),
-                         padx=20, pady=10)
-        label.pack()
+    def show_result_dialog(self, title, message, parent=None):
+        """Zeigt ein Sitzungsergebnis modal an und wartet auf OK."""
+        if self._result_dialog is None:
+            self._result_dialog = _ResultDialog(self.root)
+        self._result_dialog.show(title, message, parent or self.root)
 
-        toast.update_idletasks()
+    def _cache_root_size(self, event):
+        # <Configure> am Hauptfenster wird auch für alle Kind-Widgets ausgelöst
+        if event.widget is self.root:
+            self._root_size = (event.width, event.height)
 
-        root_width = self.root.winfo_width()
-        root_height = self.root.winfo_height()
-        toast_width = toast.winfo_width()
-        toast_height = toast.winfo_height()
+    def _show_toast_message(self, message):
+        """Simuliert eine kurze, nicht-blockierende 'Toast'-Nachricht.
+        Das Fenster wird nur einmal erzeugt und danach ein-/ausgeblendet."""
+        if self._toast is None:
+            self._toast = tk.Toplevel(self.root)
+            self._toast.wm_overrideredirect(True)
+            self._toast.withdraw()
+
+            self._toast_label = tk.Label(self._toast,
+                                         bg="#2c3e50", fg="white",
+                                         font=("Arial", 14, "bold"),
+                                         padx=20, pady=10)
+            self._toast_label.pack()
+
+        toast = self._toast
+        self._toast_label.config(text=message)
+
+        root_width, root_height = self._root_size
+        toast_size = self._toast_sizes.get(message)
+        if toast_size is None: # Nur beim ersten Auftreten einer Nachricht messen
+            toast.update_idletasks()
+            # Angeforderte Größe (gilt auch im ausgeblendeten Zustand)
+            toast_size = self._toast_sizes[message] = (toast.winfo_reqwidth(), toast.winfo_reqheight())
+        toast_width, toast_height = toast_size
 
         x = (root_width // 2) - (toast_width // 2)
         y = root_height - toast_height - 50 # Am unteren Rand
 
         toast.wm_geometry(f"+{x}+{y}")
+        toast.deiconify()
+        toast.lift()
 
-        self.root.after(3000, toast.destroy) # Zeige 3 Sekunden
+        # Ein neuer Toast verlängert die Anzeige, statt mehrere Ausblend-Callbacks zu stapeln
+        if self._toast_after:
+            self.root.after_cancel(self._toast_after)
+        self._toast_after = self.root.after(3000, self._hide_toast) # Zeige 3 Sekunden
+
+    def _hide_toast(self):
+        self._toast_after = None
+        self._toast.withdraw()
 
     def clear_screen(self):
-        """Entfernt alle Frames."""
+        """Entfernt alle Frames (gecachte Ansichten werden nur ausgeblendet)."""
         if self.current_frame:
-            self.current_frame.destroy()
+            if self.current_frame in (self._formula_frame, self._main_menu_frame, self._progress_frame):
+                self.current_frame.pack_forget()
+            else:
+                self.current_frame.destroy()
         self.current_frame = None
 
     def show_splash_screen(self):
@@ -2087,7 +2630,10 @@ class MatheGenieApp:
                                 bg="#34495e")
         splash_label.place(relx=0.5, rely=0.5, anchor=tk.CENTER)
 
-        self.root.after(4000, self.show_main_menu)
+        # Splash nur so lange zeigen, bis mindestens SPLASH_MIN_MS seit dem Start vergangen sind
+        # (die Datenbank öffnet währenddessen im Hintergrund)
+        elapsed_ms = int((time.monotonic() - self._splash_start) * 1000)
+        self.root.after(max(0, self.SPLASH_MIN_MS - elapsed_ms), self.show_main_menu)
 
     def start_practice_session(self, topic, difficulty):
         """Startet eine neue Übungssession in einem Toplevel-Fenster."""
@@ -2124,9 +2670,6 @@ class MatheGenieApp:
         # 2. Untermenü anzeigen
         self.clear_screen()
 
-        style = ttk.Style()
-        style.configure('TButton', font=('Arial', 16), padding=10)
-
         submenu_frame = tk.Frame(self.root, bg="#ecf0f1")
         submenu_frame.pack(fill=tk.BOTH, expand=True)
         self.current_frame = submenu_frame
@@ -2137,17 +2680,15 @@ class MatheGenieApp:
         button_container = tk.Frame(submenu_frame, bg="#ecf0f1")
         button_container.pack(pady=20)
 
+        # Stile 'Leicht.TButton' usw. sind in _init_styles vorkonfiguriert
         difficulties = [
-            ("Leicht", "Basis-Aufgaben...", "#D4EDDA", 'Leicht'),
-            ("Mittel", "Standard-Aufgaben...", "#FFF3CD", 'Mittel'),
-            ("Schwer", "Erweiterte Aufgaben...", "#F8D7DA", 'Schwer')
+            ("Leicht", "Basis-Aufgaben...", 'Leicht.TButton', 'Leicht'),
+            ("Mittel", "Standard-Aufgaben...", 'Mittel.TButton', 'Mittel'),
+            ("Schwer", "Erweiterte Aufgaben...", 'Schwer.TButton', 'Schwer')
         ]
 
-        for i, (level_text, tooltip_text, color, level) in enumerate(difficulties):
-            button_style = f'{level}.TButton'
-            style.configure(button_style, font=('Arial', 20, 'bold'), padding=20, background=color)
-
-            command_func = lambda t=topic, d=level: self.start_practice_session(t, d)
+        for i, (level_text, tooltip_text, button_style, level) in enumerate(difficulties):
+            command_func = functools.partial(self.start_practice_session, topic, level)
 
             button = ttk.Button(button_container, text=level_text, command=command_func,
                                 style=button_style)
@@ -2163,27 +2704,32 @@ class MatheGenieApp:
         self.root.focus_set()
 
     def show_progress_menu(self, event=None):
+        """Zeigt die Ergebnistabelle (neu geladen nur nach DB-Änderungen)."""
         self.clear_screen()
+        if self._progress_frame is None:
+            self._progress_frame = self._build_progress_frame()
+        self._progress_frame.pack(fill=tk.BOTH, expand=True)
+        self.current_frame = self._progress_frame
+
+        self.db.wait_for_writes() # Gerade beendete Sitzungen sollen schon sichtbar sein
+        if self._tree_changes != self.db.conn.total_changes:
+            self.load_results_to_tree()
 
+        self.root.focus_set()
+
+    def _build_progress_frame(self):
+        """Baut die Fortschrittsansicht samt Tabelle (noch nicht gepackt)."""
         progress_frame = tk.Frame(self.root, bg="#ecf0f1")
-        progress_frame.pack(fill=tk.BOTH, expand=True)
-        self.current_frame = progress_frame
 
         tk.Label(progress_frame, text="Lernfortschritt und Ergebnisse (SQLite-Datenbank)",
                  font=("Arial", 28, "bold"), bg="#ecf0f1").pack(pady=20)
 
-        columns = ("ID", "Thema", "Klasse", "Richtig", "Gesamt", "Dauer (s)", "Datum")
-        self.tree = ttk.Treeview(progress_frame, columns=columns, show="headings")
+        self.tree = ttk.Treeview(progress_frame, columns=tuple(c[0] for c in _PROGRESS_COLUMNS), show="headings")
         self.tree.pack(fill=tk.BOTH, expand=True, padx=50, pady=10)
 
-        for col in columns:
+        for col, width, stretch in _PROGRESS_COLUMNS:
             self.tree.heading(col, text=col)
-            self.tree.column(col, width=150, anchor=tk.CENTER)
-
-        self.tree.column("ID", width=50, stretch=tk.NO)
-        self.tree.column("Klasse", width=100, stretch=tk.NO)
-
-        self.load_results_to_tree()
+            self.tree.column(col, width=width, stretch=stretch, anchor=tk.CENTER)
 
         control_frame = tk.Frame(progress_frame, bg="#ecf0f1")
         control_frame.pack(pady=10)
@@ -2203,63 +2749,85 @@ class MatheGenieApp:
         back_button.pack(side=tk.LEFT, padx=10)
         ToolTip(back_button, "Zurück zum Hauptmenü.")
 
-        self.root.focus_set()
+        return progress_frame
 
-    def load_results_to_tree(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+    @staticmethod
+    def _result_display_row(row):
+        """Bereitet eine DB-Zeile für die Tabelle auf (Dauer mit einer Nachkommastelle)."""
+        display_row = list(row)
+        if len(display_row) > 5 and isinstance(display_row[5], (int, float)):
+            display_row[5] = f"{display_row[5]:.1f}" # Dauer formatieren
+        return display_row
 
-        results = self.db.get_all_results()
+    def load_results_to_tree(self):
+        """Füllt die Tabelle komplett neu (nur beim Öffnen; Löschen/Bearbeiten aktualisieren einzelne Zeilen)."""
+        self.tree.delete(*self.tree.get_children())
 
-        for row in results:
-            display_row = list(row)
-            if len(display_row) > 5 and isinstance(display_row[5], (int, float)):
-                display_row[5] = f"{display_row[5]:.1f}" # Dauer formatieren
-            self.tree.insert("", tk.END, values=display_row)
+        display_rows = [self._result_display_row(row) for row in self.db.get_all_results()]
+        for display_row in display_rows:
+            self.tree.insert("", tk.END, iid=display_row[0], values=display_row) # iid = DB-ID
+        self._tree_changes = self.db.conn.total_changes
 
     def delete_selected_result(self, event=None):
-        selected_item = self.tree.selection()
-        if not selected_item:
+        selected_items = self.tree.selection() # Mehrfachauswahl möglich
+        if not selected_items:
             messagebox.showwarning("Löschen", "Bitte wählen Sie ein Ergebnis zum Löschen.")
             return
 
-        result_id = self.tree.item(selected_item)['values'][0]
-        if messagebox.askyesno("Löschen bestätigen", f"Soll Ergebnis ID {result_id} wirklich gelöscht werden?"):
-            self.db.delete_result(result_id)
-            self.load_results_to_tree()
-            messagebox.showinfo("Gelöscht", f"Ergebnis ID {result_id} wurde gelöscht.")
+        result_ids = [self.tree.item(item)['values'][0] for item in selected_items]
+        id_text = ", ".join(map(str, result_ids))
+        if messagebox.askyesno("Löschen bestätigen", f"Soll Ergebnis ID {id_text} wirklich gelöscht werden?"):
+            self.db.delete_results(result_ids)
+            self.tree.delete(*selected_items) # Nur die betroffenen Zeilen entfernen
+            self._tree_changes = self.db.conn.total_changes # Tabelle ist weiterhin aktuell
+            messagebox.showinfo("Gelöscht", f"Ergebnis ID {id_text} wurde gelöscht.")
 
     def simulate_edit_result(self, event=None):
-        selected_item = self.tree.selection()
-        if not selected_item:
+        selected_items = self.tree.selection() # Mehrfachauswahl möglich
+        if not selected_items:
             messagebox.showwarning("Bearbeiten", "Bitte wählen Sie ein Ergebnis zum Bearbeiten.")
             return
 
         try:
-            old_values = self.tree.item(selected_item)['values']
-            result_id = old_values[0]
-
-            new_correct = int(old_values[3]) + 1
-            new_total = int(old_values[4])
-            new_duration = float(old_values[5]) * 0.9
-
-            if new_correct > new_total: new_correct = new_total
-
-            self.db.update_result(result_id, new_correct, new_total, new_duration)
-            self.load_results_to_tree()
-            messagebox.showinfo("Bearbeitet", f"Ergebnis ID {result_id} wurde simuliert bearbeitet.")
+            updates = [] # (Zeile, neue Anzeigewerte, DB-Parameter)
+            for item in selected_items:
+                old_values = self.tree.item(item)['values']
+                result_id = old_values[0]
+
+                new_correct = int(old_values[3]) + 1
+                new_total = int(old_values[4])
+                new_duration = float(old_values[5]) * 0.9
+
+                if new_correct > new_total: new_correct = new_total
+
+                display_row = list(old_values)
+                display_row[3:6] = [new_correct, new_total, f"{new_duration:.1f}"]
+                updates.append((item, display_row, (new_correct, new_total, new_duration, result_id)))
+
+            self.db.update_results([params for _, _, params in updates])
+            # Nur die betroffenen Zeilen aktualisieren
+            for item, display_row, _ in updates:
+                self.tree.item(item, values=display_row)
+            self._tree_changes = self.db.conn.total_changes
+            id_text = ", ".join(str(params[3]) for _, _, params in updates)
+            messagebox.showinfo("Bearbeitet", f"Ergebnis ID {id_text} wurde simuliert bearbeitet.")
         except Exception as e:
             messagebox.showerror("Fehler", f"Bearbeitung fehlgeschlagen: {e}")
 
 
     # --- MODIFIZIERT: FORMELMENÜ (Massiv erweitert) ---
     def show_formula_menu(self, event=None):
-        """Erstellt und zeigt die Ansicht mit den Formeln."""
+        """Zeigt die Ansicht mit den Formeln (beim ersten Aufruf wird sie gebaut)."""
         self.clear_screen()
+        if self._formula_frame is None:
+            self._formula_frame = self._build_formula_frame()
+        self._formula_frame.pack(fill=tk.BOTH, expand=True)
+        self.current_frame = self._formula_frame
+        self.root.focus_set()
 
+    def _build_formula_frame(self):
+        """Erstellt die Formelsammlung einmalig (ungepackt)."""
         formula_frame = tk.Frame(self.root, bg="#ecf0f1")
-        formula_frame.pack(fill=tk.BOTH, expand=True)
-        self.current_frame = formula_frame
 
         tk.Label(formula_frame, text="Formelsammlung",
                  font=("Arial", 28, "bold"), bg="#ecf0f1").pack(pady=20, side=tk.TOP) # 1. Titel
@@ -2285,13 +2853,8 @@ class MatheGenieApp:
         scrollbar = ttk.Scrollbar(canvas_frame, orient="vertical", command=main_canvas.yview)
 
         scrollable_frame = tk.Frame(main_canvas, bg="#ffffff")
-
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: main_canvas.configure(
-                scrollregion=main_canvas.bbox("all")
-            )
-        )
+        self._formula_canvas = main_canvas
+        self._scroll_pending = False
 
         main_canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
         main_canvas.configure(yscrollcommand=scrollbar.set)
@@ -2352,96 +2915,7 @@ class MatheGenieApp:
             canvas = tk.Canvas(scrollable_frame, width=220, height=150, bg="white",
                                highlightthickness=1,
                                highlightbackground="black")
-            shape = info.get('shape')
-
-            # 2D
-            if shape == 'Rechteck':
-                l_text = f"Länge: {info.get('l', '?')}"
-                w_text = f"Breite: {info.get('w', '?')}"
-                canvas.create_rectangle(40, 40, 180, 110, outline="blue", width=2)
-                canvas.create_text(110, 30, text=l_text, fill="black")
-                canvas.create_text(30, 75, text=w_text, fill="black", anchor="e")
-
-            elif shape == 'Kreis':
-                r = info.get('r', '?')
-                r_text = f"Radius: {r}"
-                canvas.create_oval(60, 20, 160, 120, outline="red", width=2)
-                canvas.create_line(110, 70, 160, 70, fill="red", dash=(4, 2))
-                canvas.create_text(135, 80, text=r_text, fill="black", anchor="w")
-
-            elif shape == 'Dreieck':
-                b_text = f"g: {info.get('b', '?')}"
-                h_text = f"h: {info.get('h', '?')}"
-                canvas.create_polygon(50, 120, 170, 120, 50, 30, fill="#eeeeee", outline="purple", width=2)
-                canvas.create_line(50, 120, 50, 30, fill="purple", dash=(4, 2))
-                canvas.create_text(110, 130, text=b_text, fill="black")
-                canvas.create_text(40, 75, text=h_text, fill="black", anchor="e")
-
-            elif shape == 'Trapez':
-                a_text = f"a: {info.get('a', '?')}"
-                c_text = f"c: {info.get('c', '?')}"
-                h_text = f"h: {info.get('h', '?')}"
-                canvas.create_polygon(50, 110, 170, 110, 130, 40, 90, 40, fill="#eeeeee", outline="orange",
-                                      width=2)
-                canvas.create_line(50, 110, 50, 40, fill="orange", dash=(4, 2))
-                canvas.create_text(110, 120, text=a_text, fill="black")
-                canvas.create_text(110, 30, text=c_text, fill="black")
-                canvas.create_text(40, 75, text=h_text, fill="black", anchor="e")
-
-            # 3D
-            elif shape == 'Würfel':
-                a_text = f"a: {info.get('a', '?')}"
-                canvas.create_rectangle(70, 70, 150, 150, outline="black", width=2) # Vorne
-                canvas.create_rectangle(50, 50, 130, 130, outline="grey", width=1) # Hinten
-                canvas.create_line(70, 70, 50, 50, outline="grey")
-                canvas.create_line(150, 70, 130, 50, outline="grey")
-                canvas.create_line(70, 150, 50, 130, outline="grey")
-                canvas.create_line(150, 150, 130, 130, outline="grey")
-                canvas.create_text(60, 110, text=a_text, fill="black")
-
-            elif shape == 'Kugel':
-                r = info.get('r', '?')
-                r_text = f"Radius: {r}"
-                canvas.create_oval(60, 30, 160, 130, outline="blue", width=2)
-                canvas.create_oval(60, 75, 160, 85, outline="blue", dash=(4, 2))
-                canvas.create_line(110, 80, 160, 80, fill="blue", dash=(2, 2))
-                canvas.create_text(135, 90, text=r_text, fill="black", anchor="w")
-
-            elif shape == 'Quader':
-                l_text = f"l: {info.get('l', '?')}"
-                w_text = f"b: {info.get('w', '?')}"
-                h_text = f"h: {info.get('h', '?')}"
-                canvas.create_rectangle(70, 70, 170, 130, outline="black", width=2) # Vorne
-                canvas.create_rectangle(50, 50, 150, 110, outline="grey", width=1) # Hinten
-                canvas.create_line(70, 70, 50, 50, outline="grey")
-                canvas.create_line(170, 70, 150, 50, outline="grey")
-                canvas.create_line(70, 130, 50, 110, outline="grey")
-                canvas.create_line(170, 130, 150, 110, outline="grey")
-                canvas.create_text(120, 60, text=l_text, fill="black")
-                canvas.create_text(160, 60, text=w_text, fill="black")
-                canvas.create_text(60, 100, text=h_text, fill="black")
-
-            elif shape == 'Zylinder':
-                r_text = f"r: {info.get('r', '?')}"
-                h_text = f"h: {info.get('h', '?')}"
-                canvas.create_oval(50, 110, 170, 130, outline="black", width=2, fill="#ddddff") # Boden
-                canvas.create_line(50, 120, 50, 50, outline="black", width=2)
-                canvas.create_line(170, 120, 170, 50, outline="black", width=2)
-                canvas.create_oval(50, 40, 170, 60, outline="black", width=2, fill="#ddddff") # Deckel
-                canvas.create_line(110, 120, 110, 50, fill="grey", dash=(2,2))
-                canvas.create_text(40, 85, text=h_text, fill="black")
-                canvas.create_text(110, 30, text=r_text, fill="black")
-
-            elif shape == 'Kegel':
-                r_text = f"r: {info.get('r', '?')}"
-                h_text = f"h: {info.get('h', '?')}"
-                canvas.create_oval(50, 110, 170, 130, outline="black", width=2, fill="#ddddff") # Boden
-                canvas.create_line(50, 120, 110, 30, outline="black", width=2)
-                canvas.create_line(170, 120, 110, 30, outline="black", width=2)
-                canvas.create_line(110, 120, 110, 30, fill="grey", dash=(2,2))
-                canvas.create_text(40, 85, text=h_text, fill="black")
-                canvas.create_text(110, 100, text=r_text, fill="black")
-
+            _draw_sketch_items(canvas, info)
             canvas.pack(pady=10, padx=20)
             bind_scroll_to_widget(canvas) # <--- KORREKTUR
 
@@ -2530,19 +3004,36 @@ class MatheGenieApp:
 
         # --- Steuerelemente (Wurden nach oben verschoben) ---
 
-        self.root.focus_set()
+        # Erst nach dem Befüllen binden: scrollregion wird gebündelt im Leerlauf neu berechnet
+        scrollable_frame.bind("<Configure>", self._schedule_scrollregion)
+        self._schedule_scrollregion()
+
+        return formula_frame
+
+    def _schedule_scrollregion(self, event=None):
+        """Fasst mehrere <Configure>-Ereignisse zu einer bbox-Berechnung zusammen."""
+        if self._scroll_pending:
+            return
+        self._scroll_pending = True
+        self.root.after_idle(self._apply_scrollregion)
+
+    def _apply_scrollregion(self):
+        self._scroll_pending = False
+        self._formula_canvas.configure(scrollregion=self._formula_canvas.bbox("all"))
 
     # --- ENDE FORMELMENÜ ---
 
     def show_main_menu(self):
         self.clear_screen()
-        menu_frame = tk.Frame(self.root, bg="#ecf0f1")
-        menu_frame.pack(fill=tk.BOTH, expand=True)
-        self.current_frame = menu_frame
+        if self._main_menu_frame is None:
+            self._main_menu_frame = self._build_main_menu_frame()
+        self._main_menu_frame.pack(fill=tk.BOTH, expand=True)
+        self.current_frame = self._main_menu_frame
+        self.root.focus_set()
 
-        style = ttk.Style()
-        style.configure('TButton', font=('Arial', 16), padding=10)
-        style.configure('Big.TButton', font=('Arial', 24, 'bold'), padding=20)
+    def _build_main_menu_frame(self):
+        """Erstellt das Hauptmenü einmalig (ungepackt)."""
+        menu_frame = tk.Frame(self.root, bg="#ecf0f1")
 
         schuljahr_button_text = f"Aktuelle Klasse: {self.selected_schuljahr.get()}"
         schuljahr_button = ttk.Button(menu_frame,
@@ -2565,7 +3056,7 @@ class MatheGenieApp:
             schuljahr_button.config(text=f"Aktuelle Klasse: {self.selected_schuljahr.get()}")
 
         self.schuljahr_dropdown.bind('<<ComboboxSelected>>', update_schuljahr_display)
-        schuljahr_button.config(command=lambda: self.schuljahr_dropdown.focus_set())
+        schuljahr_button.config(command=self.schuljahr_dropdown.focus_set)
 
         # --- MODIFIZIERTE button_info (MIT ALLEN NEUEN THEMEN) ---
         button_info = [
@@ -2604,7 +3095,7 @@ class MatheGenieApp:
                 elif "Textaufgaben" in text: topic_name = "Textaufgaben" # NEU
                 else: topic_name = text
 
-                command_func = lambda t=topic_name, f=menu_frame: self.show_topic_submenu(t, f)
+                command_func = functools.partial(self.show_topic_submenu, topic_name, menu_frame)
             else:
                 button_text = text
                 command_func = handler
@@ -2622,7 +3113,7 @@ class MatheGenieApp:
         exit_button.place(relx=1.0, rely=0.0, anchor=tk.NE, x=-20, y=20)
         ToolTip(exit_button, "Beendet die Anwendung.")
 
-        self.root.focus_set()
+        return menu_frame
 
 
 if __name__ == "__main__":